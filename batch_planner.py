@@ -0,0 +1,211 @@
+"""
+Async batch mode: plans many rides concurrently.
+
+Reads one JSON rider/ride spec per line (the fuel_model() questionnaire
+fields plus a rider_id), writes each plan into its own directory under
+WORKING_DIR/riders/ and runs the Gemini refinement loops concurrently
+through the async client. Concurrency is capped by a semaphore, request
+rate by a token bucket, and failed API calls are retried with exponential
+backoff and jitter instead of immediately.
+
+    python batch_planner.py specs.jsonl --out results.jsonl
+    python batch_planner.py specs.jsonl --no-llm
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+from config import (
+    BATCH_BURST,
+    BATCH_CONCURRENCY,
+    BATCH_REQUESTS_PER_SEC,
+    LLM_MODEL,
+    MAX_ITERATIONS,
+    RETRY_ATTEMPTS,
+    RETRY_BASE_DELAY_SEC,
+    RETRY_MAX_DELAY_SEC,
+    TRACE_PREFIX,
+    WORKING_DIR,
+)
+import tracing
+from fuel_model import estimate_timeline
+from planner import plan_fueling, write_notifications
+from prompts import refinement_prompt
+
+# estimate_timeline() arguments read from each spec
+SPEC_FIELDS = ("age", "sex", "weight", "height", "distance", "elevation_gain", "ride_time")
+
+
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second on average, with bursts up to `capacity`.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def is_retryable(error):
+    """
+    Client errors (4xx) other than 429 will fail the same way again.
+    """
+    code = getattr(error, "code", None)
+    return not (isinstance(code, int) and 400 <= code < 500 and code != 429)
+
+
+async def with_retries(call, attempts=RETRY_ATTEMPTS, base_delay=RETRY_BASE_DELAY_SEC, max_delay=RETRY_MAX_DELAY_SEC):
+    for attempt in range(attempts):
+        try:
+            return await call()
+        except Exception as e:
+            if attempt == attempts - 1 or not is_retryable(e):
+                raise
+            delay = min(max_delay, base_delay * 2 ** attempt)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+
+def is_plain_rider_id(rider_id):
+    """
+    rider_id names a directory under WORKING_DIR/riders, which becomes the
+    agent's sandbox root, so it must be a single path component.
+    """
+    return rider_id not in ("", ".", "..") and os.path.basename(rider_id) == rider_id and "\0" not in rider_id
+
+
+def load_specs(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def plan_rider(spec, client, semaphore, bucket, use_llm=True):
+    """
+    Plans one ride and returns a summary dict for the results file.
+    """
+    from main import content_config, handle_response
+
+    rider_id = str(spec["rider_id"])
+    if not is_plain_rider_id(rider_id):
+        return {"rider_id": rider_id, "status": "error",
+                "error": f'rider_id "{rider_id}" must be a plain name, not a path', "elapsed_sec": 0.0}
+    working_directory = os.path.join(WORKING_DIR, "riders", rider_id)
+    async with semaphore:
+        start = time.perf_counter()
+        with tracing.span("batch.rider", rider_id=rider_id):
+            try:
+                # Answered from the estimate grid; off the event loop because answers
+                # outside the grid (or a stale grid) fall back to simulating the ride
+                model_result = await asyncio.to_thread(
+                    estimate_timeline, **{field: spec.get(field) for field in SPEC_FIELDS}
+                )
+                notifications = plan_fueling(model_result)
+                write_notifications(notifications, working_directory)
+                if not use_llm:
+                    return {"rider_id": rider_id, "status": "ok", "response": notifications,
+                            "elapsed_sec": time.perf_counter() - start}
+
+                from google.genai import types
+                from history import HistoryManager
+
+                user_prompt = " ".join(model_result) + refinement_prompt.format(notifications=notifications)
+                messages = [types.Content(role="user", parts=[types.Part(text=user_prompt)])]
+                history = HistoryManager()
+
+                async def request():
+                    await bucket.acquire()
+                    with tracing.span("llm.generate_content", model=LLM_MODEL, messages=len(messages)):
+                        return await client.aio.models.generate_content(
+                            model=LLM_MODEL,
+                            contents=messages,
+                            config=content_config(),
+                        )
+
+                for _ in range(MAX_ITERATIONS):
+                    history.compact(messages)
+                    response = await with_retries(request)
+                    # Tool calls touch the disk, keep them off the event loop
+                    final_response = await asyncio.to_thread(
+                        handle_response, response, messages, False, history, working_directory
+                    )
+                    if final_response:
+                        return {"rider_id": rider_id, "status": "ok", "response": final_response,
+                                "elapsed_sec": time.perf_counter() - start}
+                return {"rider_id": rider_id, "status": "max_iterations",
+                        "elapsed_sec": time.perf_counter() - start}
+            except Exception as e:
+                return {"rider_id": rider_id, "status": "error", "error": str(e),
+                        "elapsed_sec": time.perf_counter() - start}
+
+
+async def plan_batch(specs, client=None, concurrency=BATCH_CONCURRENCY, requests_per_sec=BATCH_REQUESTS_PER_SEC,
+                     burst=BATCH_BURST, use_llm=True):
+    """
+    Plans every spec concurrently and yields the summaries as rides finish.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(requests_per_sec, burst)
+    tasks = [asyncio.create_task(plan_rider(spec, client, semaphore, bucket, use_llm)) for spec in specs]
+    for task in asyncio.as_completed(tasks):
+        yield await task
+
+
+async def run(args):
+    client = None
+    if not args.no_llm:
+        from dotenv import load_dotenv
+        from google import genai
+
+        load_dotenv()
+        client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+
+    specs = load_specs(args.specs)
+    tracer = tracing.enable() if args.trace else None
+    start = time.perf_counter()
+    failed = 0
+    with open(args.out, "w") as out:
+        async for result in plan_batch(specs, client, args.concurrency, args.rps, args.burst, not args.no_llm):
+            failed += result["status"] != "ok"
+            out.write(json.dumps(result) + "\n")
+            print(f' - {result["rider_id"]}: {result["status"]} ({result["elapsed_sec"]:.2f}s)')
+    elapsed = time.perf_counter() - start
+    print(f"Planned {len(specs)} rides in {elapsed:.1f}s ({len(specs) / elapsed * 60:.0f} rides/min), {failed} failed")
+    if tracer is not None:
+        tracing.disable()
+        print(tracer.summary())
+        for path in tracing.export(tracer, TRACE_PREFIX):
+            print(f"Wrote {path}")
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan many rides concurrently.")
+    parser.add_argument("specs", help="JSONL file, one rider/ride spec per line")
+    parser.add_argument("--out", default="batch_results.jsonl")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--rps", type=float, default=BATCH_REQUESTS_PER_SEC, help="LLM requests per second")
+    parser.add_argument("--burst", type=int, default=BATCH_BURST)
+    parser.add_argument("--no-llm", action="store_true", help="only run the local planner")
+    parser.add_argument("--trace", action="store_true", help=f"record spans to {TRACE_PREFIX}.jsonl / .trace.json")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
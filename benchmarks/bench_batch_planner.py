@@ -0,0 +1,114 @@
+"""
+Batch planner against a local stub of the async Gemini client: every
+request takes STUB_LATENCY_SEC and the first request of every rider fails
+with a 429, so the run exercises the semaphore, the token bucket and the
+retries without network access. Asserts every ride succeeds, that no
+one-second window saw more requests than the bucket allows, and that the
+rides overlapped instead of running one after another. Also checks that a
+rider_id which is a path, not a name, is rejected before anything is written.
+
+Run from the project root:
+    python -m benchmarks.bench_batch_planner [riders]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from google.genai import types
+
+import batch_planner
+from batch_planner import plan_batch
+
+STUB_LATENCY_SEC = 0.2
+RPS = 20
+BURST = 5
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+class StubAsyncModels:
+    def __init__(self):
+        self.request_times = []
+        self.failed = set()
+
+    async def generate_content(self, model, contents, config=None):
+        self.request_times.append(time.monotonic())
+        prompt = contents[0].parts[0].text
+        await asyncio.sleep(STUB_LATENCY_SEC)
+        if prompt not in self.failed:
+            self.failed.add(prompt)
+            raise RateLimited("429 RESOURCE_EXHAUSTED")
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(
+                role="model", parts=[types.Part(text="Timestamp: 00:20, eat 1 x energy gel")]))],
+            usage_metadata=types.GenerateContentResponseUsageMetadata(prompt_token_count=500, candidates_token_count=20),
+        )
+
+
+def stub_client():
+    """Anything with .aio.models.generate_content will do for plan_batch."""
+    return SimpleNamespace(aio=SimpleNamespace(models=StubAsyncModels()))
+
+
+def specs(n):
+    # Distinct ride times give every rider a distinct prompt
+    return [
+        {"rider_id": f"r{i:03d}", "age": 35, "sex": "Female", "weight": 140, "height": 5.6,
+         "distance": 40, "elevation_gain": 500, "ride_time": 60 + i}
+        for i in range(n)
+    ]
+
+
+async def run_batch(riders, client):
+    return [result async for result in plan_batch(specs(riders), client, concurrency=16,
+                                                  requests_per_sec=RPS, burst=BURST)]
+
+
+def check_path_rider_ids(tmp):
+    working_dir = os.path.join(tmp, "working")
+    batch_planner.WORKING_DIR = working_dir
+    bad = [dict(specs(1)[0], rider_id=rider_id) for rider_id in ("../../escaped", "/tmp/escaped", "..", "a/b", "")]
+    results = asyncio.run(collect(plan_batch(bad, use_llm=False)))
+    assert all(result["status"] == "error" for result in results), results
+    written = [os.path.join(root, name) for root, _, names in os.walk(tmp) for name in names]
+    assert not written, written
+
+
+async def collect(results):
+    return [result async for result in results]
+
+
+def main():
+    riders = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    client = stub_client()
+    with tempfile.TemporaryDirectory() as tmp:
+        # plan_rider writes every rider's notifications under WORKING_DIR
+        batch_planner.WORKING_DIR = tmp
+        start = time.perf_counter()
+        results = asyncio.run(run_batch(riders, client))
+        elapsed = time.perf_counter() - start
+        written = sum(os.path.exists(os.path.join(tmp, "riders", spec["rider_id"], "notifications.txt"))
+                      for spec in specs(riders))
+    with tempfile.TemporaryDirectory() as tmp:
+        check_path_rider_ids(tmp)
+
+    assert all(result["status"] == "ok" for result in results), [r for r in results if r["status"] != "ok"]
+    assert written == riders, written
+    times = client.aio.models.request_times
+    assert len(times) == 2 * riders, len(times)
+    busiest = max(sum(1 for t in times if start_t <= t < start_t + 1) for start_t in times)
+    assert busiest <= RPS + BURST, f"{busiest} requests in one second"
+    sequential = len(times) * STUB_LATENCY_SEC
+    assert elapsed < sequential / 2, f"{elapsed:.1f} s is no faster than sequential ({sequential:.1f} s)"
+
+    print(f"{riders} riders, {len(times)} requests (one 429 retry each) in {elapsed:.2f} s; "
+          f"sequential would take {sequential:.1f} s; busiest second {busiest} requests (limit {RPS} + burst {BURST})")
+
+
+if __name__ == "__main__":
+    main()
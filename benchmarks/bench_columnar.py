@@ -0,0 +1,70 @@
+"""
+Prediction output for multi-hour rides: to_csv / read_csv with date parsing
+against the columnar .npy directory from columnar.py. Compares size on disk,
+a full load, a single-column load and a 10 minute time slice.
+
+Run from the project root:
+    python -m benchmarks.bench_columnar [hours ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from columnar import ColumnStore, read_columns, write_columns
+
+
+def prediction_frame(hours, sample_rate_sec=1, seed=0):
+    """Same columns and dtypes as make_realtime_prediction, without running the model."""
+    rng = np.random.default_rng(seed)
+    n = int(hours * 3600 / sample_rate_sec)
+    times = pd.date_range('2024-01-01 09:00', periods=n, freq=f'{sample_rate_sec}s', tz='UTC', unit='us')
+    calculated = np.cumsum(rng.uniform(0.1, 0.4, n))
+    return pd.DataFrame({
+        'Test_Time': times,
+        'Predicted_Kcal_Burn': (calculated + rng.normal(0, 5, n)).astype(np.float32).round(2),
+        'calculated_power_kcal': calculated,
+    }).set_index('Test_Time')
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def directory_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path))
+
+
+def main():
+    hours = [float(h) for h in sys.argv[1:]] or [2, 6, 12]
+    print(f"{'ride':>6} {'format':>9} {'size MB':>8} {'write ms':>9} {'load ms':>8} {'column ms':>10} {'slice ms':>9}")
+    for h in hours:
+        df = prediction_frame(h)
+        start = df.index[len(df) // 2]
+        end = start + pd.Timedelta(minutes=10)
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, 'predictions.csv')
+            _, write_ms = timed(df.to_csv, csv_path)
+            csv_df, load_ms = timed(pd.read_csv, csv_path, index_col='Test_Time', parse_dates=['Test_Time'])
+            _, column_ms = timed(pd.read_csv, csv_path, usecols=['Predicted_Kcal_Burn'])
+            # A CSV has to be read and parsed in full before it can be sliced by time
+            _, slice_ms = timed(lambda: csv_df.loc[(csv_df.index >= start) & (csv_df.index < end)])
+            slice_ms += load_ms
+            print(f"{h:5g}h {'csv':>9} {os.path.getsize(csv_path) / 1e6:8.2f} {write_ms:9.1f} {load_ms:8.1f} {column_ms:10.1f} {slice_ms:9.1f}")
+
+            columns_path = os.path.join(tmp, 'predictions')
+            _, write_ms = timed(write_columns, df, columns_path)
+            loaded, load_ms = timed(read_columns, columns_path)
+            _, column_ms = timed(lambda: ColumnStore(columns_path).column('Predicted_Kcal_Burn'))
+            _, slice_ms = timed(read_columns, columns_path, start=start, end=end)
+            assert loaded.equals(df)
+            print(f"{'':6} {'columnar':>9} {directory_size(columns_path) / 1e6:8.2f} {write_ms:9.1f} {load_ms:8.1f} {column_ms:10.1f} {slice_ms:9.1f}")
+
+
+if __name__ == '__main__':
+    main()
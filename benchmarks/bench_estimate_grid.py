@@ -0,0 +1,85 @@
+"""
+Pre-ride estimates: interpolating the precomputed grid against simulating
+and predicting the ride with fuel_timeline, for random questionnaire
+answers inside the grid. Reports per-query latency, the error of the total
+kcal and of the intake planned by each window end, and how often the two
+fueling timelines match.
+
+Builds the grid first if it is missing or stale.
+
+Run from the project root:
+    python -m benchmarks.bench_estimate_grid [answers]
+"""
+import sys
+import time
+
+import numpy as np
+
+from config import ESTIMATE_GRID_AXES, SIM_AVG_SPEED_KMH
+from estimate_grid import estimate_total_kcal, estimate_windows, load_estimate_grid
+from fuel_model import simulate_burn
+from kcal_windows import fueling_windows, format_timeline
+from model_artifact import load_compiled_model
+
+
+def random_answers(n, seed=0):
+    rng = np.random.default_rng(seed)
+    low = {name: min(values) for name, values in ESTIMATE_GRID_AXES.items()}
+    high = {name: max(values) for name, values in ESTIMATE_GRID_AXES.items()}
+    answers = []
+    for _ in range(n):
+        ride_time = round(float(rng.uniform(low['ride_time'], high['ride_time'])))
+        answers.append({
+            'age': int(rng.integers(low['age'], high['age'] + 1)),
+            'sex': str(rng.choice(['Male', 'Female'])),
+            'weight': round(float(rng.uniform(low['weight'], high['weight'])), 1),
+            'height': round(float(rng.uniform(low['height'], high['height'])), 2),
+            'distance': round(ride_time / 60 * SIM_AVG_SPEED_KMH, 1),
+            'elevation_gain': round(float(rng.uniform(low['elevation_gain'], high['elevation_gain']))),
+            'ride_time': ride_time,
+        })
+    return answers
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    grid = load_estimate_grid()
+    model = load_compiled_model()
+    answers = random_answers(n)
+
+    start = time.perf_counter()
+    estimates = [estimate_windows(**answer, grid=grid) for answer in answers]
+    grid_sec = (time.perf_counter() - start) / n
+    start = time.perf_counter()
+    totals = [estimate_total_kcal(**answer, grid=grid) for answer in answers]
+    total_sec = (time.perf_counter() - start) / n
+
+    start = time.perf_counter()
+    simulated = []
+    for answer in answers:
+        ride, predicted_kcal = simulate_burn(**answer, model=model)
+        simulated.append(fueling_windows(ride['timestamp'], predicted_kcal, ride['lap']))
+    simulate_sec = (time.perf_counter() - start) / n
+
+    true_totals = np.array([windows['burn_kcal'].sum() for windows in simulated])
+    relative_error = np.abs(np.array(totals) - true_totals) / true_totals
+    same_timeline = np.mean([format_timeline(a) == format_timeline(b) for a, b in zip(estimates, simulated)])
+    # Single windows of the simulated plan are noisy (the burn envelope stalls and catches up),
+    # so compare the intake planned so far at every window end
+    intake_error = np.concatenate([
+        np.abs(np.cumsum(a['intake_kcal']) - np.cumsum(b['intake_kcal'])[:len(a['intake_kcal'])])
+        for a, b in zip(estimates, simulated)
+    ])
+
+    print(f"{n} random answers, grid {grid.curves.shape[:-1]}")
+    print(f"simulate + predict: {simulate_sec * 1e3:8.2f} ms per answer")
+    print(f"grid windows:       {grid_sec * 1e6:8.1f} us per answer ({simulate_sec / grid_sec:.0f}x)")
+    print(f"grid total kcal:    {total_sec * 1e6:8.1f} us per answer")
+    print(f"total kcal error: median {np.median(relative_error):.1%}, p95 {np.percentile(relative_error, 95):.1%}, "
+          f"max {relative_error.max():.1%}")
+    print(f"intake so far error: median {np.median(intake_error):.1f} kcal, p95 {np.percentile(intake_error, 95):.1f} kcal; "
+          f"identical timelines {same_timeline:.0%}")
+
+
+if __name__ == '__main__':
+    main()
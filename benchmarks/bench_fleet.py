@@ -0,0 +1,33 @@
+"""
+Fleet generation throughput for 1, 2, 4, ... workers up to the CPU count.
+
+Run from the project root:
+    python -m benchmarks.bench_fleet [rides]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from fleet import generate_fleet, random_configs
+
+
+def main():
+    n_rides = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    configs = random_configs(n_rides, seed=0)
+
+    workers = 1
+    baseline = None
+    while workers <= (os.cpu_count() or 1):
+        with tempfile.TemporaryDirectory() as out_dir:
+            start = time.perf_counter()
+            for _ in generate_fleet(configs, out_dir, seed=0, workers=workers, rides_per_shard=8):
+                pass
+            rate = n_rides / (time.perf_counter() - start)
+        baseline = baseline or rate
+        print(f"workers={workers:3}: {rate:7.1f} rides/s, speedup {rate / baseline:5.2f}x, efficiency {rate / baseline / workers:4.0%}")
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
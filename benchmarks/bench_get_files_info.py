@@ -0,0 +1,54 @@
+"""
+get_files_info on a directory with 100k files: the old listdir + getsize +
+isdir loop against the scandir version returning one page.
+
+Run from the project root:
+    python -m benchmarks.bench_get_files_info [files]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from functions.get_files_info import get_files_info
+
+
+def listdir_files_info(target_dir):
+    files_info = []
+    for filename in os.listdir(target_dir):
+        filepath = os.path.join(target_dir, filename)
+        files_info.append(
+            f'- {filename}: file_size={os.path.getsize(filepath)} bytes, is_dir={os.path.isdir(filepath)}'
+        )
+    return "\n".join(files_info)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as working_directory:
+        rides = os.path.join(working_directory, "rides")
+        os.mkdir(rides)
+        for i in range(n_files):
+            suffix = "csv" if i % 2 else "bin"
+            open(os.path.join(rides, f"ride_{i:06d}.{suffix}"), "w").close()
+
+        old, old_ms = timed(listdir_files_info, rides)
+        print(f"listdir + getsize + isdir: {old_ms:8.1f} ms, {len(old):>9} chars")
+        for label, kwargs in (
+            ("scandir, first page", {}),
+            ("scandir, page at offset 50000", {"offset": 50_000}),
+            ("scandir, pattern *.csv", {"pattern": "*.csv"}),
+            ("scandir, sorted by mtime", {"sort_by": "mtime", "descending": True}),
+        ):
+            new, new_ms = timed(get_files_info, working_directory, "rides", **kwargs)
+            print(f"{label + ':':27} {new_ms:8.1f} ms, {len(new):>9} chars")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+History compaction: runs the main.py agent loop for 20 tool-calling
+iterations against a stub model that reads a different slice of a large
+file every turn, once with a HistoryManager and once without. Asserts that
+the prompt sent on every iteration stays under HISTORY_TOKEN_BUDGET with
+compaction, and prints how the uncompacted prompt grows instead.
+
+Run from the project root:
+    python -m benchmarks.bench_history [iterations]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+from google.genai import types
+
+from config import HISTORY_TOKEN_BUDGET
+from history import HistoryManager, estimate_tokens
+from main import generate_content
+
+LINES_PER_READ = 100
+
+
+class ReadingModels:
+    """
+    Stand-in for client.models: reads the next LINES_PER_READ lines of
+    ride.csv on every call for `iterations` calls, then answers with text.
+    Records the estimated size of every prompt it is sent.
+    """
+
+    def __init__(self, iterations):
+        self.iterations = iterations
+        self.prompt_tokens = []
+
+    def generate_content(self, model, contents, config=None):
+        self.prompt_tokens.append(sum(estimate_tokens(content) for content in contents))
+        turn = len(self.prompt_tokens) - 1
+        if turn < self.iterations:
+            start_line = turn * LINES_PER_READ + 1
+            parts = [types.Part(function_call=types.FunctionCall(
+                name="get_file_content",
+                args={"file_path": "ride.csv", "start_line": start_line, "end_line": start_line + LINES_PER_READ - 1},
+            ))]
+        else:
+            parts = [types.Part(text="Timestamp: 00:20, eat 1 x energy gel")]
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=self.prompt_tokens[-1], candidates_token_count=20),
+        )
+
+
+class ReadingClient:
+    def __init__(self, iterations):
+        self.models = ReadingModels(iterations)
+
+
+def run_loop(working_directory, iterations, history):
+    client = ReadingClient(iterations)
+    messages = [types.Content(role="user", parts=[types.Part(text="Plan the fueling for this ride.")])]
+    # call_function prints every call it makes
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(iterations + 1):
+            if generate_content(client, messages, False, history, working_directory):
+                break
+    return client.models.prompt_tokens
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    with tempfile.TemporaryDirectory() as working_directory:
+        with open(os.path.join(working_directory, "ride.csv"), "w") as f:
+            for i in range(iterations * LINES_PER_READ):
+                f.write(f"2024-01-01 09:{i // 60 % 60:02d}:{i % 60:02d},{120 + i % 60},{85 + i % 10},{180 + i % 40}\n")
+
+        history = HistoryManager()
+        compacted = run_loop(working_directory, iterations, history)
+        uncompacted = run_loop(working_directory, iterations, None)
+
+    assert len(compacted) == iterations + 1, compacted
+    for iteration, tokens in enumerate(compacted):
+        assert tokens <= HISTORY_TOKEN_BUDGET, f"iteration {iteration}: {tokens} > {HISTORY_TOKEN_BUDGET} tokens"
+    assert uncompacted[-1] > HISTORY_TOKEN_BUDGET, "the reads are too small to exercise the budget"
+
+    print(f"{'iteration':>9} {'compacted':>10} {'uncompacted':>12}")
+    for iteration, (with_history, without_history) in enumerate(zip(compacted, uncompacted)):
+        print(f"{iteration:9d} {with_history:10d} {without_history:12d}")
+    print(f"max prompt {max(compacted)} tokens (budget {HISTORY_TOKEN_BUDGET}), {history.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Per-rider RLS personalization: a simulated rider burns more than the global
+model predicts. Their model is updated ride by ride and scored on a held-out
+ride, next to the global model. Also times the updates and the state I/O.
+
+Run from the project root:
+    python -m benchmarks.bench_personalize [rides]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from config import MODEL_FEATURES
+from model_artifact import load_compiled_model
+from personalize import PersonalModel, load_personal_model, personalize
+from the_model import generate_cycling_data
+
+
+def rider_ride(seed, distance_km):
+    """A ride plus this rider's 'measured' burn: 15% above the formula plus 20 kcal."""
+    ride = generate_cycling_data(route_distance_km=distance_km, sample_rate_sec=5, weight_lbs=180, age=52,
+                                 sex=1, height=5.5, rng=np.random.default_rng(seed), verbose=False)
+    rng = np.random.default_rng(seed + 1000)
+    measured = 1.15 * ride['calories_total'].to_numpy() + 20 + rng.normal(0, 10, len(ride))
+    return ride[MODEL_FEATURES], measured
+
+
+def rmse(predicted, measured):
+    return float(np.sqrt(np.mean((predicted - measured) ** 2)))
+
+
+def main():
+    n_rides = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    base_model = load_compiled_model()
+    X_test, y_test = rider_ride(seed=999, distance_km=60)
+    print(f"held-out ride: {len(y_test)} samples, global model RMSE {rmse(base_model.predict(X_test), y_test):.1f} kcal")
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        for ride in range(n_rides):
+            X, y = rider_ride(seed=ride, distance_km=[40, 80, 30, 100, 50][ride % 5])
+            start = time.perf_counter()
+            model = personalize('rider-1', X, y, model_dir=model_dir, base_model=base_model)
+            elapsed = time.perf_counter() - start
+            print(f"after ride {ride + 1}: {model.samples:6d} samples, personal RMSE "
+                  f"{rmse(model.predict(X_test), y_test):6.1f} kcal "
+                  f"(update {elapsed * 1e6 / len(y):.1f} us/sample incl. load+save)")
+
+        path = os.path.join(model_dir, 'rider-1.npz')
+        start = time.perf_counter()
+        for _ in range(100):
+            loaded = load_personal_model('rider-1', model_dir, base_model)
+        load_ms = (time.perf_counter() - start) * 10
+        assert np.allclose(loaded.predict(X_test), model.predict(X_test))
+        print(f"state: {os.path.getsize(path)} bytes, load {load_ms:.2f} ms")
+
+    fresh = PersonalModel(base_model)
+    assert np.array_equal(fresh.predict(X_test), base_model.predict(X_test))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Render time of the predicted-vs-calculated figure for rides of growing
+length at 1 Hz: every point through pyplot.scatter + line plots against
+plot_predictions (LTTB lines, hexbin above PLOT_HEXBIN_THRESHOLD).
+
+Run from the project root:
+    python -m benchmarks.bench_plotting [hours ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+
+from benchmarks.bench_columnar import prediction_frame  # noqa: E402
+from plotting import lttb, plot_predictions  # noqa: E402
+
+
+def full_resolution(prediction_df, path):
+    predicted = prediction_df['Predicted_Kcal_Burn']
+    calculated = prediction_df['calculated_power_kcal']
+    figure, (series_ax, scatter_ax) = plt.subplots(2, 1, figsize=(10, 10), height_ratios=(1, 2))
+    series_ax.plot(prediction_df.index, predicted)
+    series_ax.plot(prediction_df.index, calculated)
+    scatter_ax.scatter(predicted, calculated, marker='o', color='#3b82f6', edgecolor='k', alpha=0.7)
+    figure.savefig(path)
+    plt.close(figure)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    hours = [float(h) for h in sys.argv[1:]] or [1, 4, 12, 48]
+    print(f"{'ride':>6} {'points':>8} {'full scatter ms':>16} {'plot_predictions ms':>20} {'lttb ms':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        # Pay the one-off font cache and import costs before timing anything
+        plot_predictions(prediction_frame(0.1), os.path.join(tmp, 'warmup.png'))
+        for h in hours:
+            df = prediction_frame(h)
+            full_ms = timed(full_resolution, df, os.path.join(tmp, 'full.png'))
+            new_ms = timed(plot_predictions, df, os.path.join(tmp, 'plot.png'))
+            lttb_ms = timed(lttb, df.index.asi8 / 1e6, df['Predicted_Kcal_Burn'].to_numpy())
+            print(f"{h:5g}h {len(df):8d} {full_ms:16.1f} {new_ms:20.1f} {lttb_ms:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
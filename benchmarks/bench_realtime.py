@@ -0,0 +1,35 @@
+"""
+Per-sample latency of StreamingPredictor compared with the batch prediction.
+
+Run from the project root:
+    python -m benchmarks.bench_realtime
+"""
+import time
+
+import numpy as np
+
+from config import MODEL_FEATURES
+from model_artifact import load_compiled_model
+from realtime import StreamingPredictor
+from the_model import generate_cycling_data
+
+
+def main():
+    model = load_compiled_model()
+
+    df = generate_cycling_data(route_distance_km=40, sample_rate_sec=5, weight_lbs=150, age=30, sex=0, height=5.9)
+    expected = model.predict(df[MODEL_FEATURES])
+
+    predictor = StreamingPredictor(model, age=30, sex=0, height=5.9, weight_lbs=150)
+    samples = df[['timestamp', 'heart_rate', 'cadence', 'speed', 'power', 'lap']].to_dict('records')
+
+    start = time.perf_counter()
+    actual = [predictor.push(**sample) for sample in samples]
+    elapsed = time.perf_counter() - start
+
+    np.testing.assert_allclose(actual, expected, rtol=1e-6)
+    print(f"{len(samples)} samples, {elapsed / len(samples) * 1e6:.1f} us per push, ride total {predictor.kcal_total:.1f} kcal")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Memory per ride: the wide DataFrame from generate_cycling_data against the
+compact Ride from generate_ride, and the time to predict from each.
+
+First checks that make_realtime_prediction gives the same kcal for a Ride
+and for its DataFrame when the heart rate and power have dropouts.
+
+Run from the project root:
+    python -m benchmarks.bench_ride [km ...]
+"""
+import contextlib
+import io
+import sys
+import time
+
+import numpy as np
+
+from model_artifact import load_compiled_model
+from ride import Ride
+from the_model import generate_cycling_data, generate_ride, make_realtime_prediction
+
+
+def check_dropouts(model):
+    ride = generate_ride(rng=np.random.default_rng(0), sex='Female')
+    heart_rate = ride.telemetry('heart_rate')
+    heart_rate[100:400] = np.nan
+    power = ride['power'].astype(np.float64)
+    power[50:60] = np.nan
+    ride = Ride(ride.timestamp, heart_rate, ride.telemetry('cadence'), ride['speed'], power,
+                ride.age, ride.sex, ride.height, ride.weight_lbs, lap=ride['lap'])
+    df = ride.to_frame()
+    df['sex'] = ride.sex_code
+    # make_realtime_prediction prints a sample of its predictions
+    with contextlib.redirect_stdout(io.StringIO()):
+        from_ride = make_realtime_prediction(model, ride)[1]
+        from_df = make_realtime_prediction(model, df)[1]
+    assert not np.isnan(from_ride).any()
+    assert np.array_equal(from_df, from_ride), np.abs(from_df - from_ride).max()
+
+
+def main():
+    distances = [float(km) for km in sys.argv[1:]] or [40, 100, 300]
+    model = load_compiled_model()
+    check_dropouts(model)
+    print("HR and power dropouts: Ride and DataFrame predictions match")
+    print(f"{'ride':>7} {'rows':>7} {'DataFrame MB':>13} {'Ride MB':>8} {'ratio':>6} {'predict df ms':>14} {'predict Ride ms':>16}")
+    for km in distances:
+        df = generate_cycling_data(route_distance_km=km, sample_rate_sec=1, rng=np.random.default_rng(0), verbose=False)
+        ride = generate_ride(route_distance_km=km, sample_rate_sec=1, rng=np.random.default_rng(0))
+        df_bytes = df.memory_usage(deep=True).sum()
+
+        start = time.perf_counter()
+        from_df = model.predict(df)
+        df_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        from_ride = model.predict(ride.feature_matrix())
+        ride_ms = (time.perf_counter() - start) * 1000
+        assert np.array_equal(from_df, from_ride)
+
+        print(f"{km:5g}km {len(ride):7d} {df_bytes / 1e6:13.2f} {ride.nbytes / 1e6:8.2f} {df_bytes / ride.nbytes:5.1f}x {df_ms:14.1f} {ride_ms:16.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""
+Ride file ingestion: writes a simulated ride as FIT, GPX and TCX fixtures
+(plain and gzipped), parses them back with ride_files, checks the samples
+survive the round trip, and reports parse speed and peak Python memory.
+Then ingests a batch of files on the process pool.
+
+Run from the project root:
+    python -m benchmarks.bench_ride_files [hours] [files]
+"""
+import gzip
+import os
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from columnar import read_columns
+from ride_files import FIT_EPOCH, FIT_LAP, FIT_RECORD, MPS_TO_MPH, ingest, ingest_file, iter_chunks, read_ride
+from the_model import generate_cycling_data
+
+GPX_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<gpx version="1.1" creator="bench" xmlns="http://www.topografix.com/GPX/1/1" '
+    'xmlns:gpxtpx="http://www.garmin.com/xmlschemas/TrackPointExtension/v1">\n<trk>\n'
+)
+TCX_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<TrainingCenterDatabase xmlns="http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2" '
+    'xmlns:ns3="http://www.garmin.com/xmlschemas/ActivityExtension/v2">\n<Activities><Activity Sport="Biking">\n'
+)
+
+
+def fixture_ride(hours, laps=2, seed=0):
+    """A 1 Hz simulated ride split into equal laps, speed in mph as the model expects."""
+    ride = generate_cycling_data(route_distance_km=25 * hours, sample_rate_sec=1,
+                                 rng=np.random.default_rng(seed), verbose=False)
+    ride['lap'] = np.arange(len(ride)) * laps // len(ride) + 1
+    return ride
+
+
+def iso(timestamp):
+    return timestamp.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def write_gpx(ride, path):
+    with open(path, 'w') as f:
+        f.write(GPX_HEADER)
+        for _, lap in ride.groupby('lap'):
+            f.write('<trkseg>\n')
+            for row in lap.itertuples():
+                f.write(
+                    f'<trkpt lat="45.0" lon="{7 + row.Distance_km / 78.7:.7f}"><time>{iso(row.timestamp)}</time>'
+                    f'<extensions><power>{row.power}</power><gpxtpx:TrackPointExtension>'
+                    f'<gpxtpx:hr>{row.heart_rate}</gpxtpx:hr><gpxtpx:cad>{row.cadence}</gpxtpx:cad>'
+                    f'<gpxtpx:speed>{row.speed / MPS_TO_MPH:.4f}</gpxtpx:speed>'
+                    f'</gpxtpx:TrackPointExtension></extensions></trkpt>\n'
+                )
+            f.write('</trkseg>\n')
+        f.write('</trk>\n</gpx>\n')
+
+
+def write_tcx(ride, path):
+    with open(path, 'w') as f:
+        f.write(TCX_HEADER)
+        for _, lap in ride.groupby('lap'):
+            f.write(f'<Lap StartTime="{iso(lap.timestamp.iloc[0])}"><Track>\n')
+            for row in lap.itertuples():
+                f.write(
+                    f'<Trackpoint><Time>{iso(row.timestamp)}</Time>'
+                    f'<DistanceMeters>{row.Distance_km * 1000:.1f}</DistanceMeters>'
+                    f'<HeartRateBpm><Value>{row.heart_rate}</Value></HeartRateBpm><Cadence>{row.cadence}</Cadence>'
+                    f'<Extensions><ns3:TPX><ns3:Speed>{row.speed / MPS_TO_MPH:.4f}</ns3:Speed>'
+                    f'<ns3:Watts>{row.power}</ns3:Watts></ns3:TPX></Extensions></Trackpoint>\n'
+                )
+            f.write('</Track></Lap>\n')
+        f.write('</Activity></Activities>\n</TrainingCenterDatabase>\n')
+
+
+def fit_crc(data, crc=0):
+    table = (0x0000, 0xCC01, 0xD801, 0x1400, 0xF001, 0x3C00, 0x2800, 0xE401,
+             0xA001, 0x6C00, 0x7800, 0xB401, 0x5000, 0x9C01, 0x8801, 0x4400)
+    for byte in data:
+        tmp = table[crc & 0xF]
+        crc = (crc >> 4) & 0x0FFF
+        crc = crc ^ tmp ^ table[byte & 0xF]
+        tmp = table[crc & 0xF]
+        crc = (crc >> 4) & 0x0FFF
+        crc = crc ^ tmp ^ table[(byte >> 4) & 0xF]
+    return crc
+
+
+def write_fit(ride, path):
+    """Minimal FIT activity: record messages (local type 0) and a lap message (local type 1) per lap."""
+    # Definitions: header, reserved, little endian, global number, field count, (number, size, base type)
+    record_fields = [(253, 4, 0x86), (3, 1, 0x02), (4, 1, 0x02), (6, 2, 0x84), (7, 2, 0x84)]
+    body = bytearray()
+    body += struct.pack('<BBBHB', 0x40, 0, 0, FIT_RECORD, len(record_fields))
+    body += b''.join(struct.pack('<BBB', *field) for field in record_fields)
+    body += struct.pack('<BBBHB', 0x41, 0, 0, FIT_LAP, 1) + struct.pack('<BBB', 253, 4, 0x86)
+
+    record = struct.Struct('<BIBBHH')
+    seconds = ride['timestamp'].astype('int64').to_numpy() // 10**6 - FIT_EPOCH
+    speed = np.round(ride['speed'].to_numpy() / MPS_TO_MPH * 1000).astype(int)
+    laps = ride['lap'].to_numpy()
+    for i, (heart_rate, cadence, power) in enumerate(zip(ride['heart_rate'], ride['cadence'], ride['power'])):
+        body += record.pack(0x00, seconds[i], heart_rate, cadence, speed[i], power)
+        if i + 1 == len(ride) or laps[i + 1] != laps[i]:
+            body += struct.pack('<BI', 0x01, seconds[i])
+
+    header = struct.pack('<BBHI4s', 14, 0x20, 2100, len(body), b'.FIT')
+    header += struct.pack('<H', fit_crc(header))
+    data = header + bytes(body)
+    with open(path, 'wb') as f:
+        f.write(data + struct.pack('<H', fit_crc(data)))
+
+
+WRITERS = {'fit': write_fit, 'gpx': write_gpx, 'tcx': write_tcx}
+
+
+def gzip_copy(path):
+    with open(path, 'rb') as src, gzip.open(path + '.gz', 'wb') as dst:
+        dst.write(src.read())
+    return path + '.gz'
+
+
+def check_round_trip(ride, parsed, path):
+    assert len(parsed) == len(ride), (path, len(parsed), len(ride))
+    assert (parsed['timestamp'].to_numpy() == ride['timestamp'].dt.tz_convert('UTC').to_numpy()).all(), path
+    for column in ('heart_rate', 'cadence', 'power', 'lap'):
+        assert np.array_equal(parsed[column].to_numpy(), ride[column].to_numpy()), (path, column)
+    assert np.allclose(parsed['speed'], ride['speed'], atol=0.01), path
+
+
+def peak_memory(func, *args):
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def stream(path):
+    for _ in iter_chunks(path):
+        pass
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    n_files = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    ride = fixture_ride(hours)
+    print(f"{hours:g} h ride, {len(ride)} samples, {ride['lap'].nunique()} laps")
+    print(f"{'file':>10} {'size MB':>8} {'parse s':>8} {'samples/s':>10} {'stream MB':>9} {'ingest MB':>9}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for extension, writer in WRITERS.items():
+            path = os.path.join(tmp, f'ride.{extension}')
+            writer(ride, path)
+            paths += [path, gzip_copy(path)]
+
+        for path in paths:
+            start = time.perf_counter()
+            parsed = read_ride(path)
+            elapsed = time.perf_counter() - start
+            check_round_trip(ride, parsed, path)
+            stream_peak = peak_memory(stream, path)
+            ingest_peak = peak_memory(ingest_file, path, os.path.join(tmp, 'single'))
+            print(f"{os.path.basename(path):>10} {os.path.getsize(path) / 1e6:8.1f} {elapsed:8.2f} "
+                  f"{len(parsed) / elapsed:10.0f} {stream_peak / 1e6:9.1f} {ingest_peak / 1e6:9.1f}")
+
+        # Every fixture is named ride.*, and the batch repeats them from several
+        # folders, so each output directory name has to be made unique
+        batch = []
+        for i in range(n_files):
+            folder = os.path.join(tmp, f'export{i // len(paths)}')
+            os.makedirs(folder, exist_ok=True)
+            link = os.path.join(folder, os.path.basename(paths[i % len(paths)]))
+            if not os.path.exists(link):
+                os.symlink(paths[i % len(paths)], link)
+            batch.append(link)
+        for workers in (1, None):
+            start = time.perf_counter()
+            results = list(ingest(batch, os.path.join(tmp, f'out-{workers}'), workers=workers))
+            elapsed = time.perf_counter() - start
+            assert all(ride_dir is not None for _, ride_dir, _, _ in results), results
+            assert len({ride_dir for _, ride_dir, _, _ in results}) == n_files, "output directories collided"
+            for path, ride_dir, rows, laps in results:
+                check_round_trip(ride, read_columns(ride_dir), ride_dir)
+            print(f"ingest {n_files} files, workers={workers or os.cpu_count()}: {elapsed:.1f} s, "
+                  f"{n_files} distinct outputs round-trip")
+
+
+if __name__ == '__main__':
+    main()
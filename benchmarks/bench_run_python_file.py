@@ -0,0 +1,83 @@
+"""
+run_python_file on a script importing numpy, pandas and statsmodels: a fresh
+interpreter per call against a child forked from the warm forkserver.
+
+First checks that both ways shut a script down the same: its atexit
+handlers run and a file it never closed is flushed.
+
+Run from the project root:
+    python -m benchmarks.bench_run_python_file [calls]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from functions.run_python_file import run_in_subprocess, run_in_worker, warm_up
+
+SCRIPT = """
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+
+df = pd.DataFrame({"x": np.arange(100.0)})
+df["y"] = 2 * df["x"] + 1
+print(sm.OLS(df["y"], sm.add_constant(df["x"])).fit().params.round(3).tolist())
+"""
+
+SHUTDOWN_SCRIPT = """
+import atexit
+
+atexit.register(lambda: print("atexit ran"))
+log = open("unclosed.txt", "w")
+log.write("flushed at exit")
+"""
+
+
+def check_shutdown(run, working_directory):
+    script = os.path.join(working_directory, "shutdown.py")
+    with open(script, "w") as f:
+        f.write(SHUTDOWN_SCRIPT)
+    unclosed = os.path.join(working_directory, "unclosed.txt")
+    if os.path.exists(unclosed):
+        os.remove(unclosed)
+
+    stdout, stderr, returncode = run(script, [], working_directory)
+    assert returncode == 0, stderr
+    assert "atexit ran" in stdout, (run.__name__, stdout)
+    with open(unclosed) as f:
+        assert f.read() == "flushed at exit", run.__name__
+
+
+def per_call_ms(run, abs_file_path, cwd, calls):
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        stdout, stderr, returncode = run(abs_file_path, [], cwd)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert returncode == 0, stderr
+    return timings
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with tempfile.TemporaryDirectory() as working_directory:
+        script = os.path.join(working_directory, "fit.py")
+        with open(script, "w") as f:
+            f.write(SCRIPT)
+
+        start = time.perf_counter()
+        warm_up()
+        print(f"forkserver warm-up:     {(time.perf_counter() - start) * 1000:8.1f} ms (once per session)")
+
+        for run in (run_in_subprocess, run_in_worker):
+            check_shutdown(run, working_directory)
+        print("atexit handlers and unclosed files: same in both")
+
+        for label, run in (("subprocess per call:", run_in_subprocess), ("forkserver worker:", run_in_worker)):
+            timings = sorted(per_call_ms(run, script, working_directory, calls))
+            print(f"{label:23} {timings[len(timings) // 2]:8.1f} ms median, {timings[-1]:8.1f} ms max")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Load test for server.py on localhost: many concurrent clients posting to
+/api/predict (small real-time batches) or /api/plan (whole ride forms).
+Prints client-side throughput and p50/p99, then the server's own /api/stats.
+
+Starts its own server on a free port unless --url is given.
+
+Run from the project root:
+    python -m benchmarks.load_test --endpoint predict --clients 32 --requests 2000
+    python -m benchmarks.load_test --endpoint plan --clients 8 --requests 100
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --endpoint plan
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from config import MODEL_FEATURES, SERVER_BATCH_WAIT_MS
+
+
+def predict_body(rng, rows):
+    """rows feature vectors in the range the simulated rides cover."""
+    X = np.column_stack([
+        rng.integers(120, 181, rows), rng.integers(50, 121, rows), rng.uniform(5, 30, rows),
+        rng.uniform(0, 400, rows), np.ones(rows), np.full(rows, 35), np.zeros(rows), np.full(rows, 5.9),
+        np.full(rows, 160), np.full(rows, 160 * 0.453592), rng.integers(0, 7200, rows),
+        rng.uniform(0, 1500, rows), rng.uniform(0, 1500, rows),
+    ])
+    assert X.shape[1] == len(MODEL_FEATURES)
+    return {'rows': X.round(2).tolist()}
+
+
+def plan_body(rng):
+    return {
+        'age': int(rng.integers(18, 70)), 'sex': str(rng.choice(['Female', 'Male'])),
+        'weightKg': float(rng.uniform(50, 100)), 'heightCm': float(rng.uniform(155, 195)),
+        'rideDistanceKm': float(rng.choice([20, 40, 80])), 'rideTimeMin': 120,
+    }
+
+
+def post(url, body):
+    request = urllib.request.Request(url, data=json.dumps(body).encode(), headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the prediction server.')
+    parser.add_argument('--url', help='running server to test, default: start one on a free port')
+    parser.add_argument('--endpoint', choices=('predict', 'plan'), default='predict')
+    parser.add_argument('--clients', type=int, default=32, help='concurrent clients')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--rows', type=int, default=10, help='feature rows per /api/predict request')
+    parser.add_argument('--batch-wait-ms', type=float, default=SERVER_BATCH_WAIT_MS,
+                        help='batching window of the local server, 0 disables batching')
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        from server import make_server
+        server = make_server(port=0, batch_wait_ms=args.batch_wait_ms)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_address[1]}'
+
+    rng = np.random.default_rng(0)
+    if args.endpoint == 'predict':
+        bodies = [predict_body(rng, args.rows) for _ in range(args.requests)]
+    else:
+        bodies = [plan_body(rng) for _ in range(args.requests)]
+    endpoint = f'{url}/api/{args.endpoint}'
+    # One untimed request so imports and caches are warm
+    post(endpoint, bodies[0])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as executor:
+        latencies = np.array(list(executor.map(lambda body: post(endpoint, body), bodies))) * 1000
+    elapsed = time.perf_counter() - start
+
+    print(f'{args.requests} requests to /api/{args.endpoint} from {args.clients} clients in {elapsed:.2f} s '
+          f'({args.requests / elapsed:.0f} req/s)')
+    print(f'client latency: p50 {np.percentile(latencies, 50):.1f} ms, p99 {np.percentile(latencies, 99):.1f} ms')
+    with urllib.request.urlopen(f'{url}/api/stats') as response:
+        print('server stats:', json.dumps(json.load(response), indent=2))
+
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+"""
+Benchmark suite for the model and agent hot paths.
+
+The model path (generate_cycling_data, calculate_duration_from_lap_start,
+calories_hr/calories_power and make_realtime_prediction) is swept over ride
+length and sample rate to give scaling curves. The file tools and a full
+agent loop against a stub LLM run once per repeat.
+
+Results are written as JSON. With --baseline, every benchmark is compared to
+an earlier results file and the run exits 1 when one got slower than its
+threshold (BENCH_REGRESSION_THRESHOLD / BENCH_THRESHOLDS in config.py).
+
+Run from the project root:
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --baseline bench.json --output bench-new.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from calories import calories_hr, calories_power
+from config import BENCH_MIN_DELTA_MS, BENCH_REGRESSION_THRESHOLD, BENCH_THRESHOLDS
+from model_artifact import load_compiled_model
+from the_model import calculate_duration_from_lap_start, generate_cycling_data, make_realtime_prediction
+
+DISTANCES_KM = [10, 40, 100, 300]
+SAMPLE_RATES_SEC = [1, 5, 10]
+
+
+def best_of(func, repeat):
+    """
+    Fastest of `repeat` calls in seconds, after one untimed call for lazy
+    imports and caches; the minimum is the least noisy estimate.
+    """
+    func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def model_benchmarks(distance_km, sample_rate_sec):
+    """(name, func) pairs for one point of the sweep, all sharing one generated ride."""
+    model = load_compiled_model()
+    ride = generate_cycling_data(route_distance_km=distance_km, sample_rate_sec=sample_rate_sec,
+                                 rng=np.random.default_rng(0), verbose=False)
+    telemetry = ride[['timestamp', 'lap', 'heart_rate', 'power']]
+    heart_rate, power = ride['heart_rate'].to_numpy(), ride['power'].to_numpy()
+    duration_sec = ride['duration_sec'].to_numpy()
+
+    def predict():
+        # make_realtime_prediction prints a sample of its output
+        with contextlib.redirect_stdout(io.StringIO()):
+            make_realtime_prediction(model, ride)
+
+    return len(ride), [
+        ('generate_cycling_data', lambda: generate_cycling_data(
+            route_distance_km=distance_km, sample_rate_sec=sample_rate_sec,
+            rng=np.random.default_rng(0), verbose=False)),
+        ('calculate_duration_from_lap_start', lambda: calculate_duration_from_lap_start(telemetry)),
+        ('calories_hr_power', lambda: (calories_hr(heart_rate, duration_sec, 150, 30, 0),
+                                       calories_power(power, duration_sec))),
+        ('make_realtime_prediction', predict),
+    ]
+
+
+def make_working_directory(root, n_files=1_000, content_lines=100_000):
+    for i in range(n_files):
+        with open(os.path.join(root, f"ride_{i:05d}.csv"), "w") as f:
+            f.write("timestamp,kcal\n")
+    with open(os.path.join(root, "predictions.csv"), "w") as f:
+        f.writelines(f"2024-01-01 09:{i // 60 % 60:02d}:{i % 60:02d},{i * 0.2:.2f}\n" for i in range(content_lines))
+
+
+def tool_benchmarks(working_directory):
+    from functions.get_file_content import get_file_content
+    from functions.get_files_info import get_files_info
+    from functions.write_file import write_file
+
+    return [
+        ('get_files_info', lambda: get_files_info(working_directory, pattern="*.csv")),
+        ('get_file_content', lambda: get_file_content(working_directory, "predictions.csv", start_line=50_000, end_line=50_100)),
+        ('write_file', lambda: write_file(working_directory, "notifications.txt", "x" * 10_000, mode="atomic")),
+    ]
+
+
+class StubModels:
+    """
+    Scripted stand-in for client.models: lists the files, reads one, writes
+    the notifications and then answers with text, like a short real session.
+    """
+
+    def __init__(self):
+        from google.genai import types
+
+        self.types = types
+        self.turn = 0
+
+    def generate_content(self, model, contents, config=None):
+        types = self.types
+        script = [
+            [types.FunctionCall(name="get_files_info", args={"pattern": "*.csv", "limit": 50}),
+             types.FunctionCall(name="get_file_content", args={"file_path": "predictions.csv", "start_line": 1, "end_line": 200})],
+            [types.FunctionCall(name="write_file", args={"file_path": "notifications.txt", "content": "Timestamp: 00:20, eat 1 x energy gel\n"})],
+        ]
+        if self.turn < len(script):
+            parts = [types.Part(function_call=call) for call in script[self.turn]]
+        else:
+            parts = [types.Part(text="Timestamp: 00:20, eat 1 x energy gel")]
+        self.turn += 1
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+            usage_metadata=types.GenerateContentResponseUsageMetadata(prompt_token_count=500, candidates_token_count=50),
+        )
+
+
+class StubClient:
+    def __init__(self):
+        self.models = StubModels()
+
+
+def agent_loop(working_directory):
+    """The main.py loop (generate_content until a final text) against StubClient."""
+    from google.genai import types
+    from history import HistoryManager
+    from main import generate_content
+
+    client = StubClient()
+    history = HistoryManager()
+    messages = [types.Content(role="user", parts=[types.Part(text="Plan the fueling for this ride.")])]
+    # call_function prints every call it makes
+    with contextlib.redirect_stdout(io.StringIO()):
+        while not generate_content(client, messages, False, history, working_directory):
+            pass
+
+
+def run_suite(distances, sample_rates, repeat, only=None):
+    results = []
+
+    def record(name, seconds, distance_km=None, sample_rate_sec=None, rows=None):
+        result = {
+            'name': name,
+            'distance_km': distance_km,
+            'sample_rate_sec': sample_rate_sec,
+            'rows': rows,
+            'seconds': seconds,
+        }
+        if rows:
+            result['us_per_row'] = seconds / rows * 1e6
+        results.append(result)
+
+    for distance_km in distances:
+        for sample_rate_sec in sample_rates:
+            rows, benchmarks = model_benchmarks(distance_km, sample_rate_sec)
+            for name, func in benchmarks:
+                if only and name not in only:
+                    continue
+                record(name, best_of(func, repeat), distance_km, sample_rate_sec, rows)
+                print(f"{name:34} {distance_km:5g} km {sample_rate_sec:3g} s {rows:7d} rows {results[-1]['seconds'] * 1000:9.2f} ms")
+
+    with tempfile.TemporaryDirectory() as working_directory:
+        make_working_directory(working_directory)
+        benchmarks = tool_benchmarks(working_directory)
+        benchmarks.append(('agent_loop', lambda: agent_loop(working_directory)))
+        for name, func in benchmarks:
+            if only and name not in only:
+                continue
+            record(name, best_of(func, repeat))
+            print(f"{name:34} {'':22} {results[-1]['seconds'] * 1000:9.2f} ms")
+    return results
+
+
+def result_key(result):
+    return result['name'], result['distance_km'], result['sample_rate_sec']
+
+
+def find_regressions(results, baseline, threshold=None):
+    """
+    Benchmarks slower than the baseline by more than their threshold and by
+    more than BENCH_MIN_DELTA_MS. Returns (result, baseline_seconds, allowed) tuples.
+    """
+    previous = {result_key(result): result['seconds'] for result in baseline['results']}
+    regressions = []
+    for result in results:
+        before = previous.get(result_key(result))
+        if before is None:
+            continue
+        allowed = threshold if threshold is not None else BENCH_THRESHOLDS.get(result['name'], BENCH_REGRESSION_THRESHOLD)
+        delta_ms = (result['seconds'] - before) * 1000
+        if result['seconds'] > before * (1 + allowed) and delta_ms > BENCH_MIN_DELTA_MS:
+            regressions.append((result, before, allowed))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the model and agent hot paths.")
+    parser.add_argument("--distances", type=float, nargs="+", default=DISTANCES_KM, help="ride lengths in km")
+    parser.add_argument("--sample-rates", type=int, nargs="+", default=SAMPLE_RATES_SEC, help="seconds between samples")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark, the fastest is kept")
+    parser.add_argument("--only", nargs="+", help="run only these benchmarks")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, help="allowed slowdown for every benchmark, overrides config")
+    args = parser.parse_args()
+
+    results = run_suite(args.distances, args.sample_rates, args.repeat, args.only)
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.threshold)
+        for result, before, allowed in regressions:
+            where = f" at {result['distance_km']:g} km / {result['sample_rate_sec']:g} s" if result['rows'] else ""
+            print(f"REGRESSION {result['name']}{where}: {before * 1000:.2f} ms -> "
+                  f"{result['seconds'] * 1000:.2f} ms (allowed +{allowed:.0%})")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,17 @@
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from google.genai import types
 
 from functions.get_files_info import schema_get_files_info, get_files_info
 from functions.get_file_content import schema_get_file_content, get_file_content
 from functions.write_file import schema_write_file, write_file
-# from functions.run_python_file import schema_run_python_file, run_python_file
+from functions.run_python_file import schema_run_python_file, run_python_file
 # from functions.generate_image import schema_generate_image, generate_image
-from config import WORKING_DIR
+import tracing
+from config import MAX_TOOL_WORKERS, WORKING_DIR
 
 
 available_functions = types.Tool(
@@ -13,12 +19,12 @@ available_functions = types.Tool(
         schema_get_files_info,
         schema_get_file_content,
         schema_write_file,
-        # schema_run_python_file,
+        schema_run_python_file,
         # schema_generate_image,
     ]
 )
 
-def call_function(function_call_part, verbose=False):
+def call_function(function_call_part, verbose=False, working_directory=WORKING_DIR):
     if verbose:
         print(f'Calling function: {function_call_part.name}({function_call_part.args})')
     else:
@@ -28,7 +34,7 @@ def call_function(function_call_part, verbose=False):
         "get_files_info": get_files_info,
         "get_file_content": get_file_content,
         "write_file": write_file,
-        # "run_python_file": run_python_file,
+        "run_python_file": run_python_file,
         # "generate_image": generate_image,
     }
     function_name = function_call_part.name
@@ -44,8 +50,10 @@ def call_function(function_call_part, verbose=False):
         )
 
     args = dict(function_call_part.args)
-    args["working_directory"] = WORKING_DIR
-    function_result = functions_map[function_name](**args)
+    args["working_directory"] = working_directory
+    with tracing.span("tool.call", function=function_name) as span:
+        function_result = functions_map[function_name](**args)
+        span.set(result_chars=len(function_result))
     return types.Content(
         role="tool",
         parts=[
@@ -55,3 +63,58 @@ def call_function(function_call_part, verbose=False):
             )
         ],
     )
+
+
+def _call_group(function_call_parts, verbose, working_directory):
+    results = []
+    for function_call_part in function_call_parts:
+        start = time.perf_counter()
+        function_call_result = call_function(function_call_part, verbose, working_directory)
+        results.append((function_call_result, time.perf_counter() - start))
+    return results
+
+
+def call_functions(function_call_parts, verbose=False, max_workers=MAX_TOOL_WORKERS, working_directory=WORKING_DIR):
+    """
+    Runs all function calls of one model turn on a bounded thread pool.
+
+    Calls that touch a file written in the same turn are kept together and
+    run one after another in their original order, so writes to one path are
+    never reordered or overlapped. Everything else runs concurrently.
+    Returns [(function_call_result, latency_sec), ...] in the original order.
+    """
+    function_call_parts = list(function_call_parts)
+
+    written = set()
+    for function_call_part in function_call_parts:
+        if function_call_part.name == "write_file":
+            written.add(_target_path(function_call_part, working_directory))
+
+    groups = {}
+    for index, function_call_part in enumerate(function_call_parts):
+        path = _target_path(function_call_part, working_directory)
+        key = path if path in written else index
+        groups.setdefault(key, []).append((index, function_call_part))
+
+    if len(groups) <= 1 or max_workers <= 1:
+        return _call_group(function_call_parts, verbose, working_directory)
+
+    results = [None] * len(function_call_parts)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(groups))) as executor:
+        futures = [
+            # Run in a copy of the caller's context so tool spans keep their parent
+            (group, executor.submit(contextvars.copy_context().run, _call_group,
+                                    [part for _, part in group], verbose, working_directory))
+            for group in groups.values()
+        ]
+        for group, future in futures:
+            for (index, _), result in zip(group, future.result()):
+                results[index] = result
+    return results
+
+
+def _target_path(function_call_part, working_directory):
+    file_path = (function_call_part.args or {}).get("file_path")
+    if file_path is None:
+        return None
+    return os.path.abspath(os.path.join(working_directory, file_path))
@@ -0,0 +1,65 @@
+import numpy as np
+
+# Vectorized versions of the per-row calorie formulas in the_model.py.
+# Every argument may be a scalar (one rider for the whole ride) or an array
+# broadcastable against the telemetry columns (many riders stacked together).
+
+LBS_TO_KG = 0.453592
+KJ_PER_KCAL = 4.184
+JOULES_PER_KCAL = 4184
+# human mechanical efficiency ~24%
+MECHANICAL_EFFICIENCY = 0.24
+
+
+def is_female(sex):
+    """
+    Boolean mask for the female branch of the HR formula.
+    Matches the row-wise rule: only the string 'Female' selects it.
+    """
+    return np.asarray(sex, dtype=object) == 'Female'
+
+
+def calories_hr(heart_rate, duration_sec, weight_lbs, age, sex):
+    """
+    Heart-rate based kcal since the lap start, computed on whole columns.
+    """
+    heart_rate = np.asarray(heart_rate, dtype=np.float64)
+    weight_kg = np.asarray(weight_lbs, dtype=np.float64) * LBS_TO_KG
+    age = np.asarray(age, dtype=np.float64)
+
+    female = (-20.4022 + 0.4472*heart_rate - 0.1263*weight_kg + 0.074*age) / KJ_PER_KCAL
+    male = (-55.0969 + 0.6309*heart_rate + 0.1988*weight_kg + 0.2017*age) / KJ_PER_KCAL
+    kcal_min = np.where(is_female(sex), female, male)
+
+    return kcal_min * (np.asarray(duration_sec, dtype=np.float64) / 60.0)
+
+
+def calories_power(power, duration_sec):
+    """
+    Power based kcal since the lap start, computed on whole columns.
+    """
+    power = np.asarray(power, dtype=np.float64)
+    duration_sec = np.asarray(duration_sec, dtype=np.float64)
+    return (power * duration_sec) / (MECHANICAL_EFFICIENCY * JOULES_PER_KCAL)
+
+
+def calories_total(kcal_hr, kcal_power):
+    return 0.7*kcal_hr + 0.3*kcal_power
+
+
+def add_calorie_columns(df, weight_lbs=None, age=None, sex=None):
+    """
+    Adds 'calories_hr', 'calories_power' and 'calories_total' to df in place.
+
+    Rider attributes default to the df columns of the same name; pass scalars
+    to skip reading the per-row copies when they are constant for the ride.
+    """
+    weight_lbs = df['weight_lbs'].to_numpy() if weight_lbs is None else weight_lbs
+    age = df['age'].to_numpy() if age is None else age
+    sex = df['sex'].to_numpy() if sex is None else sex
+    duration_sec = df['duration_sec'].to_numpy()
+
+    df['calories_hr'] = calories_hr(df['heart_rate'].to_numpy(), duration_sec, weight_lbs, age, sex)
+    df['calories_power'] = calories_power(df['power'].to_numpy(), duration_sec)
+    df['calories_total'] = calories_total(df['calories_hr'], df['calories_power'])
+    return df
@@ -0,0 +1,177 @@
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Bump when the on-disk layout below changes
+COLUMNAR_VERSION = 1
+HEADER_FILE = 'header.json'
+
+
+# Space kept at the start of every .npy file for its header, which is only
+# written once the row count is known (128 bytes fits any 1-D column)
+NPY_HEADER_BYTES = 128
+
+
+def _column_values(series):
+    """The array stored for a column, and its header entry minus the file name."""
+    column = {}
+    if isinstance(series.dtype, pd.DatetimeTZDtype) or np.issubdtype(series.dtype, np.datetime64):
+        tz = getattr(series.dt, 'tz', None)
+        values = (series.dt.tz_convert('UTC').dt.tz_localize(None) if tz is not None else series).to_numpy()
+        column['unit'] = np.datetime_data(values.dtype)[0]
+        column['tz'] = str(tz) if tz is not None else None
+        values = values.view(np.int64)
+    else:
+        values = series.to_numpy()
+    column['dtype'] = values.dtype.str
+    return np.ascontiguousarray(values), column
+
+
+class ColumnWriter:
+    """
+    Streaming side of write_columns: appends DataFrame chunks with the same
+    columns and dtypes to the column files, so a table never has to be in
+    memory at once. header.json is written on close, so a directory whose
+    writer failed part way has no header and cannot be opened.
+    """
+
+    def __init__(self, path, index=None):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.header = {'version': COLUMNAR_VERSION, 'rows': 0, 'index': index, 'columns': {}}
+        self.files = {}
+
+    def append(self, frame):
+        columns = self.header['columns']
+        if self.files and list(frame.columns) != list(columns):
+            raise ValueError(f'Columns {list(frame.columns)} do not match {list(columns)}')
+        for name in frame.columns:
+            values, column = _column_values(frame[name])
+            if name not in self.files:
+                column['file'] = f'{name}.npy'
+                columns[name] = column
+                self.files[name] = open(os.path.join(self.path, column['file']), 'wb')
+                self.files[name].write(b'\0' * NPY_HEADER_BYTES)
+            elif any(columns[name].get(key) != value for key, value in column.items()):
+                raise ValueError(f'Column "{name}" changed type from {columns[name]} to {column}')
+            self.files[name].write(memoryview(values).cast('B'))
+        self.header['rows'] += len(frame)
+
+    def close(self):
+        for name, f in self.files.items():
+            header = io.BytesIO()
+            np.lib.format.write_array_header_1_0(header, {
+                'descr': np.lib.format.dtype_to_descr(np.dtype(self.header['columns'][name]['dtype'])),
+                'fortran_order': False,
+                'shape': (self.header['rows'],),
+            })
+            if len(header.getvalue()) != NPY_HEADER_BYTES:
+                raise ValueError(f'.npy header for "{name}" does not fit in {NPY_HEADER_BYTES} bytes')
+            f.seek(0)
+            f.write(header.getvalue())
+            f.close()
+        with open(os.path.join(self.path, HEADER_FILE), 'w') as f:
+            json.dump(self.header, f, indent=2)
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            for f in self.files.values():
+                f.close()
+
+
+def write_columns(df, path):
+    """
+    Writes a DataFrame as a directory of one .npy file per column plus a small
+    header.json. The index (e.g. Test_Time) is stored as a column too.
+
+    Datetimes are stored as int64 ticks with their unit and time zone in the
+    header, so nothing has to be parsed on load. Other columns keep their dtype.
+    """
+    frame = df.reset_index() if df.index.name is not None else df
+    with ColumnWriter(path, index=df.index.name) as writer:
+        writer.append(frame)
+    return path
+
+
+class ColumnStore:
+    """
+    Read side of write_columns. Columns are memory-mapped on first access, so
+    loading one column or one time range only touches those pages.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, HEADER_FILE)) as f:
+            self.header = json.load(f)
+        if self.header['version'] != COLUMNAR_VERSION:
+            raise ValueError(f"Unsupported columnar version {self.header['version']} in {path}")
+        self._arrays = {}
+
+    @property
+    def columns(self):
+        return list(self.header['columns'])
+
+    def __len__(self):
+        return self.header['rows']
+
+    def raw(self, name):
+        """The stored array for a column, memory-mapped (datetimes as int64 ticks)."""
+        if name not in self._arrays:
+            column = self.header['columns'][name]
+            self._arrays[name] = np.load(os.path.join(self.path, column['file']), mmap_mode='r', allow_pickle=False)
+        return self._arrays[name]
+
+    def column(self, name, start_row=0, stop_row=None):
+        values = self.raw(name)[start_row:stop_row]
+        column = self.header['columns'][name]
+        if 'unit' not in column:
+            return np.asarray(values)
+        times = pd.DatetimeIndex(np.asarray(values).view(f"datetime64[{column['unit']}]"))
+        return times.tz_localize('UTC').tz_convert(column['tz']) if column['tz'] else times
+
+    def rows_between(self, start=None, end=None, on=None):
+        """
+        Row range [start_row, stop_row) with start <= time < end, found by a
+        binary search of the (sorted) time column rather than a full scan.
+        """
+        on = on or self.header['index']
+        column = self.header['columns'][on]
+        ticks = self.raw(on)
+
+        def to_ticks(value):
+            value = pd.Timestamp(value)
+            if column['tz']:
+                value = value.tz_localize(column['tz']) if value.tzinfo is None else value
+                value = value.tz_convert('UTC').tz_localize(None)
+            return value.to_datetime64().astype(f"datetime64[{column['unit']}]").view(np.int64)
+
+        start_row = 0 if start is None else int(np.searchsorted(ticks, to_ticks(start), side='left'))
+        stop_row = len(ticks) if end is None else int(np.searchsorted(ticks, to_ticks(end), side='left'))
+        return start_row, max(stop_row, start_row)
+
+    def to_frame(self, columns=None, start=None, end=None):
+        start_row, stop_row = self.rows_between(start, end) if start is not None or end is not None else (0, len(self))
+        index_name = self.header['index']
+        names = [name for name in (columns or self.columns) if name != index_name]
+        frame = pd.DataFrame({name: self.column(name, start_row, stop_row) for name in names})
+        if index_name is not None:
+            frame.index = self.column(index_name, start_row, stop_row)
+            frame.index.name = index_name
+        return frame
+
+
+def read_columns(path, columns=None, start=None, end=None):
+    """
+    Loads a directory written by write_columns back into a DataFrame,
+    optionally only some columns and only the rows with start <= time < end.
+    """
+    return ColumnStore(path).to_frame(columns, start, end)
@@ -1,3 +1,135 @@
 MAX_CHARS=10_000
+FILES_INFO_PAGE_SIZE=200
+# Files whose newline index get_file_content keeps in memory
+NEWLINE_INDEX_CACHE_FILES=32
 WORKING_DIR="./calculator"
 MAX_ITERATIONS=20
+LLM_MODEL="gemini-2.0-flash-001"
+
+MODEL_PATH="cal_burn_model.pkl"
+# NumPy-only export of MODEL_PATH, see model_artifact.py
+MODEL_ARTIFACT_PATH="cal_burn_model.npz"
+# Feature order the calorie burn model was trained on
+MODEL_FEATURES=[
+    'heart_rate', 'cadence', 'speed', 'power', 'lap', 'age',
+    'sex', 'height', 'weight_lbs', 'weight_kg', 'duration_sec',
+    'calories_hr', 'calories_power',
+]
+
+# Cold import budgets checked by startup_profile.py
+STARTUP_BUDGET_MS={
+    "main": 100,
+    "the_model": 1000,
+}
+
+NOTIFICATIONS_FILE="notifications.txt"
+# Foods the local fueling planner can recommend, per serving
+FOOD_TABLE=[
+    {"name": "small banana", "kcal": 90, "verb": "eat"},
+    {"name": "energy gel", "kcal": 100, "verb": "eat"},
+    {"name": "sports drink (500 ml)", "kcal": 130, "verb": "drink"},
+    {"name": "energy bar", "kcal": 230, "verb": "eat"},
+]
+# Most servings the planner combines into one notification
+MAX_SERVINGS=2
+
+# On-disk cache of LLM responses, see response_cache.py
+CACHE_DIR=".cache/responses"
+CACHE_MAX_BYTES=50_000_000
+CACHE_TTL_SEC=7 * 24 * 3600
+
+# Threads used to run the function calls of one model turn concurrently
+MAX_TOOL_WORKERS=4
+
+# Agent history compaction, see history.py
+HISTORY_TOKEN_BUDGET=8_000
+HISTORY_KEEP_RECENT=2
+HISTORY_MIN_COMPACT_CHARS=500
+
+# Async batch planning, see batch_planner.py
+BATCH_CONCURRENCY=16
+BATCH_REQUESTS_PER_SEC=10
+BATCH_BURST=10
+RETRY_ATTEMPTS=5
+RETRY_BASE_DELAY_SEC=0.5
+RETRY_MAX_DELAY_SEC=30
+
+# Fueling windows, see kcal_windows.py
+FUEL_WINDOW_MIN=20
+# Share of the burned kcal to replace while riding
+FUEL_REPLACE_FRACTION=0.5
+# Roughly 90 g of carbohydrate per hour
+FUEL_MAX_INTAKE_KCAL_HR=360
+# Numeric 'sex' feature of the burn model (generate_cycling_data defaults to 0)
+SEX_CODES={"Male": 0, "Female": 1}
+# Accepted answers (lower-cased) for the sex question. The burn model only knows the two
+# codes above, so any other answer is rejected rather than guessed.
+SEX_ALIASES={
+    "m": "Male", "male": "Male", "man": "Male", "0": "Male",
+    "f": "Female", "female": "Female", "woman": "Female", "1": "Female",
+}
+# Simulated rides (the_model.simulate_telemetry) when the ride time or the climb is not given
+SIM_AVG_SPEED_KMH=25
+SIM_ELEVATION_GAIN_M=300
+# Sample interval of the rides fuel_model simulates
+SIM_SAMPLE_RATE_SEC=5
+
+# run_python_file: libraries imported once by the warm forkserver, and the per-script timeout
+RUN_PYTHON_PRELOAD=["numpy", "pandas", "statsmodels.api"]
+RUN_PYTHON_TIMEOUT_SEC=30
+
+# benchmarks/run.py: allowed slowdown against the baseline, as a fraction
+BENCH_REGRESSION_THRESHOLD=0.25
+# Per-benchmark overrides of BENCH_REGRESSION_THRESHOLD
+BENCH_THRESHOLDS={
+    "make_realtime_prediction": 0.2,
+}
+# Slowdowns below this are timer noise and never count as regressions
+BENCH_MIN_DELTA_MS=1.0
+
+# --trace writes <TRACE_PREFIX>.jsonl and <TRACE_PREFIX>.trace.json, see tracing.py
+TRACE_PREFIX=".cache/traces/trace"
+
+# plotting.py: points kept per line by LTTB, and above how many points scatters become hexbins
+PLOT_LTTB_POINTS=2_000
+PLOT_HEXBIN_THRESHOLD=20_000
+PLOT_PATH="predicted_vs_calculated.png"
+
+# ride_files.py: samples per DataFrame chunk when streaming FIT/GPX/TCX files
+RIDE_FILE_CHUNK_ROWS=10_000
+
+# personalize.py: per-rider RLS corrections on top of the global model
+PERSONAL_MODEL_DIR="personal_models"
+# 1.0 weighs all history equally; below 1 old rides fade (e.g. 0.9999)
+PERSONALIZE_FORGETTING=1.0
+# Prior variance of each correction coefficient, in kcal^2
+PERSONALIZE_PRIOR_VARIANCE=1e4
+# Typical magnitude of each feature; corrections are fitted on x / scale
+PERSONALIZE_FEATURE_SCALE={
+    'heart_rate': 150, 'cadence': 90, 'speed': 20, 'power': 200, 'lap': 1, 'age': 40,
+    'sex': 1, 'height': 6, 'weight_lbs': 160, 'weight_kg': 70, 'duration_sec': 3600,
+    'calories_hr': 500, 'calories_power': 500,
+}
+
+# server.py: local prediction server and its request micro-batching
+SERVER_HOST="127.0.0.1"
+SERVER_PORT=8000
+# How long the batcher waits for more requests once one is queued
+SERVER_BATCH_WAIT_MS=2
+SERVER_BATCH_MAX_ROWS=50_000
+# Latencies kept per endpoint for the p50/p99 report
+SERVER_LATENCY_WINDOW=10_000
+
+# estimate_grid.py: precomputed pre-ride estimates, rebuilt when MODEL_ARTIFACT_PATH changes
+ESTIMATE_GRID_PATH="cal_burn_grid.npz"
+# fuel_timeline() arguments and the values simulated for each; queries between them are interpolated
+ESTIMATE_GRID_AXES={
+    'age': [18, 40, 60, 80],
+    'sex': [0, 1],  # SEX_CODES
+    'weight': [100, 150, 200, 250],  # lbs
+    'height': [4.5, 7.0],  # ft, the burn is close to linear in height
+    'elevation_gain': [0, 250, 500, 1000, 2000],  # m
+    'ride_time': [15, 30, 60, 120, 240, 480],  # min
+}
+# Cumulative burn is stored at this many evenly spaced fractions of each ride
+ESTIMATE_GRID_PROGRESS_POINTS=49
@@ -0,0 +1,258 @@
+"""
+Precomputed pre-ride estimates for the fuel_model() questionnaire.
+
+Answering with fuel_timeline means simulating and predicting a whole ride.
+build_grid does that offline, on a process pool, for every combination of
+ESTIMATE_GRID_AXES and stores each ride's cumulative burn at
+ESTIMATE_GRID_PROGRESS_POINTS evenly spaced fractions of the ride. A query
+interpolates multilinearly between the 2^6 surrounding grid points and
+samples that curve at the fueling window ends, in microseconds.
+
+Distance is not an axis: for a given ride time the simulated burn does not
+depend on it, it only sets the ride time when that is left blank.
+
+The grid file records the sha256 of the model artifact it was built from;
+load_estimate_grid rebuilds it when the artifact or the axes change, or the
+file cannot be read. Concurrent callers wait for a single rebuild.
+
+    python estimate_grid.py --workers 8
+"""
+import argparse
+import functools
+import hashlib
+import itertools
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import tracing
+from config import (
+    ESTIMATE_GRID_AXES,
+    ESTIMATE_GRID_PATH,
+    ESTIMATE_GRID_PROGRESS_POINTS,
+    FUEL_WINDOW_MIN,
+    MODEL_ARTIFACT_PATH,
+    SEX_CODES,
+    SIM_AVG_SPEED_KMH,
+)
+
+# Bump when the saved grid layout changes
+ESTIMATE_GRID_VERSION = 1
+SEX_LABELS = {code: label for label, code in SEX_CODES.items()}
+# What a missing, truncated or foreign grid file raises on load
+GRID_LOAD_ERRORS = (ValueError, OSError, EOFError, KeyError, zipfile.BadZipFile)
+# Held while loading, so threads that miss the cache share one rebuild
+_load_lock = threading.Lock()
+
+
+def artifact_digest(artifact_path=MODEL_ARTIFACT_PATH):
+    digest = hashlib.sha256()
+    with open(artifact_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def burn_curve(point, names, progress, artifact_path=MODEL_ARTIFACT_PATH):
+    """
+    Cumulative kcal at each progress fraction of the ride simulated for one
+    grid point (a tuple of values in the order of names).
+    """
+    from fuel_model import simulate_burn
+    from kcal_windows import burn_increments, elapsed_seconds
+    from model_artifact import load_compiled_model
+
+    arguments = dict(zip(names, point))
+    arguments['sex'] = SEX_LABELS[arguments['sex']]
+    distance = arguments['ride_time'] / 60 * SIM_AVG_SPEED_KMH
+    ride, predicted_kcal = simulate_burn(distance=distance, model=load_compiled_model(artifact_path), **arguments)
+    cumulative = np.cumsum(burn_increments(predicted_kcal, ride['lap']))
+    return np.interp(progress * arguments['ride_time'] * 60, elapsed_seconds(ride['timestamp']), cumulative)
+
+
+class EstimateGrid:
+    """
+    Cumulative burn curves over a regular grid of rider and ride parameters.
+    curves has one axis per entry of axes plus the progress axis.
+    """
+
+    def __init__(self, axes, progress, curves, artifact_sha256):
+        self.names = list(axes)
+        self.axes = [np.asarray(values, dtype=np.float64) for values in axes.values()]
+        self.progress = np.asarray(progress, dtype=np.float64)
+        self.curves = np.asarray(curves, dtype=np.float32)
+        self.artifact_sha256 = artifact_sha256
+
+        # Flat offsets of the 2^d corners of a grid cell, relative to its lowest corner
+        shape = self.curves.shape[:-1]
+        strides = np.cumprod((1,) + shape[:0:-1])[::-1]
+        self._corners = np.array(list(itertools.product((0, 1), repeat=len(shape))), dtype=bool)
+        self._corner_offsets = self._corners @ strides
+        self._strides = strides
+        self._flat = self.curves.reshape(-1, len(self.progress)).astype(np.float64)
+
+    def curve(self, point):
+        """
+        The interpolated cumulative burn curve at point (values in the order
+        of names), or None when the point lies outside the grid.
+        """
+        lower = np.empty(len(self.axes), dtype=np.intp)
+        t = np.empty(len(self.axes))
+        for i, (axis, value) in enumerate(zip(self.axes, point)):
+            if not axis[0] <= value <= axis[-1]:
+                return None
+            j = min(int(np.searchsorted(axis, value, side='right')) - 1, len(axis) - 2)
+            lower[i] = j
+            t[i] = (value - axis[j]) / (axis[j + 1] - axis[j])
+        weights = np.where(self._corners, t, 1 - t).prod(axis=1)
+        return weights @ self._flat[lower @ self._strides + self._corner_offsets]
+
+    def windows(self, point, window_min=FUEL_WINDOW_MIN):
+        """The fueling_windows dict for the interpolated ride at point, or None outside the grid."""
+        from kcal_windows import intake_schedule
+
+        curve = self.curve(point)
+        if curve is None:
+            return None
+        duration_sec = point[self.names.index('ride_time')] * 60
+        window_sec = window_min * 60
+        end_sec = (np.arange(max(int(np.ceil(duration_sec / window_sec)), 1)) + 1) * window_sec
+        cumulative = np.interp(np.minimum(end_sec / duration_sec, 1.0), self.progress, curve)
+        return intake_schedule(end_sec, np.diff(cumulative, prepend=0.0))
+
+    def matches(self, axes, artifact_sha256):
+        return (
+            self.artifact_sha256 == artifact_sha256
+            and self.names == list(axes)
+            and all(np.array_equal(axis, values) for axis, values in zip(self.axes, axes.values()))
+        )
+
+    def save(self, path):
+        # Write to a temp file and rename so readers never see a partial grid
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(
+                    f,
+                    version=np.int32(ESTIMATE_GRID_VERSION),
+                    names=np.asarray(self.names),
+                    progress=self.progress,
+                    curves=self.curves,
+                    artifact_sha256=np.asarray(self.artifact_sha256),
+                    **{f'axis_{name}': axis for name, axis in zip(self.names, self.axes)},
+                )
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as grid:
+            version = int(grid['version'])
+            if version != ESTIMATE_GRID_VERSION:
+                raise ValueError(f'Unsupported estimate grid version {version} in "{path}"')
+            names = [str(name) for name in grid['names']]
+            axes = {name: grid[f'axis_{name}'] for name in names}
+            return cls(axes, grid['progress'], grid['curves'], str(grid['artifact_sha256']))
+
+
+def build_grid(axes=ESTIMATE_GRID_AXES, progress_points=ESTIMATE_GRID_PROGRESS_POINTS,
+               artifact_path=MODEL_ARTIFACT_PATH, workers=None):
+    """
+    Simulates and predicts one ride per grid point on a process pool.
+    """
+    names = tuple(axes)
+    points = list(itertools.product(*axes.values()))
+    progress = np.linspace(0, 1, progress_points)
+    job = functools.partial(burn_curve, names=names, progress=progress, artifact_path=artifact_path)
+    chunksize = max(1, len(points) // (4 * (workers or os.cpu_count() or 1)))
+    with tracing.span("estimate_grid.build", points=len(points)):
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            curves = list(executor.map(job, points, chunksize=chunksize))
+    shape = [len(values) for values in axes.values()] + [progress_points]
+    return EstimateGrid(axes, progress, np.reshape(curves, shape), artifact_digest(artifact_path))
+
+
+def load_estimate_grid(path=ESTIMATE_GRID_PATH, artifact_path=MODEL_ARTIFACT_PATH, rebuild=True):
+    """
+    The grid for the current model artifact. A missing or stale grid file is
+    rebuilt and saved (or None is returned when rebuild is False).
+    """
+    stat = os.stat(artifact_path)
+    with _load_lock:
+        return _load_current(path, artifact_path, stat.st_mtime_ns, stat.st_size, rebuild)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_current(path, artifact_path, artifact_mtime_ns, artifact_size, rebuild):
+    # Keyed on the artifact's mtime and size, so it is only hashed again when it may have changed
+    digest = artifact_digest(artifact_path)
+    try:
+        grid = EstimateGrid.load(path)
+    except GRID_LOAD_ERRORS:
+        grid = None
+    if grid is not None and grid.matches(ESTIMATE_GRID_AXES, digest):
+        return grid
+    if not rebuild:
+        return None
+    print(f'Building the pre-ride estimate grid for "{artifact_path}"...')
+    grid = build_grid(artifact_path=artifact_path)
+    grid.save(path)
+    return grid
+
+
+def grid_point(age, sex, weight, height, distance, elevation_gain, ride_time):
+    """fuel_timeline() arguments as a point in ESTIMATE_GRID_AXES order."""
+    from fuel_model import normalize_sex, ride_profile
+
+    elevation_gain_m, duration_sec = ride_profile(distance, elevation_gain, ride_time)
+    values = {
+        'age': float(age),
+        'sex': SEX_CODES[normalize_sex(sex)],
+        'weight': float(weight),
+        'height': float(height),
+        'elevation_gain': elevation_gain_m,
+        'ride_time': duration_sec / 60,
+    }
+    return [values[name] for name in ESTIMATE_GRID_AXES]
+
+
+def estimate_windows(age, sex, weight, height, distance, elevation_gain, ride_time, window_min=FUEL_WINDOW_MIN, grid=None):
+    """
+    Pre-ride fueling_windows estimate from the grid, or None when the
+    answers fall outside it.
+    """
+    grid = grid if grid is not None else load_estimate_grid()
+    return grid.windows(grid_point(age, sex, weight, height, distance, elevation_gain, ride_time), window_min)
+
+
+def estimate_total_kcal(age, sex, weight, height, distance, elevation_gain, ride_time, grid=None):
+    """Expected kcal for the whole ride, or None outside the grid."""
+    grid = grid if grid is not None else load_estimate_grid()
+    curve = grid.curve(grid_point(age, sex, weight, height, distance, elevation_gain, ride_time))
+    return None if curve is None else float(curve[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the pre-ride estimate grid.')
+    parser.add_argument('--out', default=ESTIMATE_GRID_PATH)
+    parser.add_argument('--artifact', default=MODEL_ARTIFACT_PATH)
+    parser.add_argument('--workers', type=int, default=None, help='defaults to the number of CPUs')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    grid = build_grid(artifact_path=args.artifact, workers=args.workers)
+    grid.save(args.out)
+    print(f'{grid.curves.shape[:-1]} grid ({np.prod(grid.curves.shape[:-1])} rides) in '
+          f'{time.perf_counter() - start:.1f} s -> {args.out} ({os.path.getsize(args.out) / 1e3:.0f} KB)')
+
+
+if __name__ == '__main__':
+    main()
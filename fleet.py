@@ -0,0 +1,115 @@
+"""
+Fleet-scale synthetic ride generation.
+
+Spreads many rider/route configurations over a process pool. Ride i always
+gets the seed SeedSequence(seed, spawn_key=(i,)), so a ride is reproducible
+regardless of the worker count or shard size it was generated with. Workers
+write their rides straight to shard files and only return a summary, so the
+parent never holds the whole corpus in memory.
+
+    python fleet.py --rides 5000 --workers 8 --out fleet_data
+    python fleet.py --configs riders.jsonl --out fleet_data
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from the_model import generate_cycling_data
+
+# generate_cycling_data arguments a config may set
+CONFIG_KEYS = ('route_distance_km', 'sample_rate_sec', 'weight_lbs', 'age', 'sex', 'height')
+
+
+def random_configs(n_rides, seed=0):
+    """
+    Samples n_rides plausible rider/route configurations.
+    """
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            'route_distance_km': int(rng.integers(10, 201)),
+            'sample_rate_sec': int(rng.choice([1, 2, 5, 10])),
+            'weight_lbs': int(rng.integers(110, 231)),
+            'age': int(rng.integers(18, 76)),
+            'sex': int(rng.integers(0, 2)),
+            'height': round(float(rng.uniform(5.0, 6.6)), 1),
+        }
+        for _ in range(n_rides)
+    ]
+
+
+def load_configs(path):
+    """
+    Reads one JSON object of generate_cycling_data arguments per line.
+    """
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def ride_seed(seed, ride_id):
+    return np.random.SeedSequence(seed, spawn_key=(ride_id,))
+
+
+def generate_shard(shard_path, jobs, seed):
+    """
+    Generates the rides for one shard and appends them to shard_path one at a time.
+    jobs is a list of (ride_id, config). Returns (shard_path, rides, rows).
+    """
+    rows = 0
+    with open(shard_path, 'w', newline='') as f:
+        for i, (ride_id, config) in enumerate(jobs):
+            rng = np.random.default_rng(ride_seed(seed, ride_id))
+            arguments = {key: config[key] for key in CONFIG_KEYS if key in config}
+            ride = generate_cycling_data(rng=rng, verbose=False, **arguments)
+            ride.insert(0, 'ride_id', ride_id)
+            ride.to_csv(f, header=(i == 0), index=False)
+            rows += len(ride)
+    return shard_path, len(jobs), rows
+
+
+def generate_fleet(configs, out_dir, seed=0, workers=None, rides_per_shard=100):
+    """
+    Generates every config into out_dir/shard-NNNNN.csv using a process pool.
+    Yields (shard_path, rides, rows) as shards finish.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = list(enumerate(configs))
+    shards = [jobs[i:i + rides_per_shard] for i in range(0, len(jobs), rides_per_shard)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(generate_shard, os.path.join(out_dir, f'shard-{i:05d}.csv'), shard, seed)
+            for i, shard in enumerate(shards)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic rides in parallel.')
+    parser.add_argument('--rides', type=int, default=1000, help='number of random configurations to generate')
+    parser.add_argument('--configs', help='JSONL file of configurations, overrides --rides')
+    parser.add_argument('--out', default='fleet_data', help='output directory for the shards')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help='defaults to the number of CPUs')
+    parser.add_argument('--rides-per-shard', type=int, default=100)
+    args = parser.parse_args()
+
+    configs = load_configs(args.configs) if args.configs else random_configs(args.rides, args.seed)
+
+    start = time.perf_counter()
+    total_rides = total_rows = 0
+    for shard_path, rides, rows in generate_fleet(configs, args.out, args.seed, args.workers, args.rides_per_shard):
+        total_rides += rides
+        total_rows += rows
+        print(f'{shard_path}: {rides} rides, {rows} rows')
+    elapsed = time.perf_counter() - start
+    print(f'Generated {total_rides} rides ({total_rows} rows) in {elapsed:.1f}s, {total_rides / elapsed:.1f} rides/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,41 +1,125 @@
+import tracing
+from config import (
+    FUEL_WINDOW_MIN,
+    SEX_ALIASES,
+    SEX_CODES,
+    SIM_AVG_SPEED_KMH,
+    SIM_ELEVATION_GAIN_M,
+    SIM_SAMPLE_RATE_SEC,
+)
+
+
 def fuel_model():
     print("Before the ride questionnaire")
     age = input("Enter your age: ")
     sex = input("Enter your sex: ")
-    weight = input("Enter your weight: ")
-    height = input("Enter your height: ")
+    while sex.strip().lower() not in SEX_ALIASES:
+        sex = input("The burn model only knows male and female, please enter one of them (m/f): ")
+    weight = input("Enter your weight (lbs): ")
+    height = input("Enter your height (ft): ")
     rider = f"Your age is {age}, your sex is {sex}, your weight is {weight}, your height is {height}"
     print(rider)
     
     print("Let's go on a hypothetical ride")
-    distance = input("Enter the distance of the ride: ")
-    elevation_gain = input("Enter the elevation gain of the ride: ")
+    distance = input("Enter the distance of the ride (km): ")
+    elevation_gain = input("Enter the elevation gain of the ride (m): ")
     ride_time = input("Enter the ride time in minutes: ")
     ride = f"The distance of the ride is {distance}, the elevation gain is {elevation_gain}, the ride time is {ride_time} minutes"
     print(ride)
-    
-    model_result = []
-
-    fake_noticiation_1 = f"Timestamp: 00:20, kcal: 100"
-    fake_noticiation_2 = f"Timestamp: 00:30, kcal: 50"
-    fake_noticiation_3 = f"Timestamp: 00:50, kcal: 150"
-    fake_noticiation_4 = f"Timestamp: 01:10, kcal: 80"
-    fake_noticiation_5 = f"Timestamp: 01:30, kcal: 180"
-    fake_noticiation_6 = f"Timestamp: 01:50, kcal: 100"
-    fake_noticiation_7 = f"Timestamp: 02:10, kcal: 50"
-    fake_noticiation_8 = f"Timestamp: 02:30, kcal: 120"
-    fake_noticiation_9 = f"Timestamp: 02:40, kcal: 100"
-    fake_noticiation_10 = f"Timestamp: 03:00, kcal: 50"
-
-    model_result.append(fake_noticiation_1)
-    model_result.append(fake_noticiation_2)
-    model_result.append(fake_noticiation_3)
-    model_result.append(fake_noticiation_4)
-    model_result.append(fake_noticiation_5)
-    model_result.append(fake_noticiation_6)
-    model_result.append(fake_noticiation_7)
-    model_result.append(fake_noticiation_8)
-    model_result.append(fake_noticiation_9)
-    model_result.append(fake_noticiation_10)
-
-    return model_result
\ No newline at end of file
+
+    return estimate_timeline(age, sex, weight, height, distance, elevation_gain, ride_time)
+
+
+def normalize_sex(sex):
+    """
+    "Male" or "Female" for the common spellings in SEX_ALIASES (any case,
+    surrounding spaces ignored, or the numeric SEX_CODES). Raises ValueError otherwise.
+    """
+    label = SEX_ALIASES.get(str(sex).strip().lower())
+    if label is None:
+        raise ValueError(f'The burn model only knows male and female (sex codes 0 and 1), got "{sex}"')
+    return label
+
+
+def ride_profile(distance, elevation_gain, ride_time):
+    """
+    Climb in m and duration in s for the simulated ride. Blank answers fall
+    back to the simulator's default climb and pace. Raises ValueError when
+    the ride would be shorter than one sample.
+    """
+    elevation_gain = SIM_ELEVATION_GAIN_M if elevation_gain in (None, '') else float(elevation_gain)
+    if ride_time in (None, ''):
+        duration_sec = float(distance) / SIM_AVG_SPEED_KMH * 3600
+    else:
+        duration_sec = float(ride_time) * 60
+    # Also rejects NaN
+    if not duration_sec >= SIM_SAMPLE_RATE_SEC:
+        raise ValueError(f'The ride is too short to simulate ({duration_sec:g} s, at least {SIM_SAMPLE_RATE_SEC} s needed)')
+    return elevation_gain, duration_sec
+
+
+def simulate_burn(age, sex, weight, height, distance, elevation_gain, ride_time, model=None):
+    """
+    Simulates the ride with generate_cycling_data and predicts its burn with
+    the compiled model (or `model`, anything with .predict).
+    Returns the ride DataFrame and the predicted kcal per sample.
+    """
+    # Imported here so the questionnaire and main.py start without pandas
+    import numpy as np
+    from the_model import generate_cycling_data
+    from model_artifact import load_compiled_model
+
+    sex = normalize_sex(sex)
+    elevation_gain_m, duration_sec = ride_profile(distance, elevation_gain, ride_time)
+    with tracing.span("model.generate_data", distance_km=float(distance)) as span:
+        ride = generate_cycling_data(
+            route_distance_km=float(distance),
+            sample_rate_sec=SIM_SAMPLE_RATE_SEC,
+            weight_lbs=float(weight),
+            age=float(age),
+            sex=sex,
+            height=float(height),
+            # Fixed seed so the same answers always give the same plan
+            rng=np.random.default_rng(0),
+            verbose=False,
+            elevation_gain_m=elevation_gain_m,
+            duration_sec=duration_sec,
+        )
+        span.set(rows=len(ride))
+    # The HR formula needs the label, the model the numeric code
+    ride['sex'] = SEX_CODES[sex]
+    if model is None:
+        with tracing.span("model.load"):
+            model = load_compiled_model()
+    with tracing.span("model.predict", rows=len(ride)):
+        return ride, model.predict(ride)
+
+
+def fuel_timeline(age, sex, weight, height, distance, elevation_gain, ride_time, window_min=FUEL_WINDOW_MIN, model=None):
+    """
+    Timestamped kcal list for a rider and ride, without the interactive questionnaire.
+
+    Simulates the ride and its burn with simulate_burn and aggregates it into
+    fueling windows. elevation_gain sets the main climb and ride_time the
+    duration; when they are blank the simulator's defaults are used.
+    """
+    from kcal_windows import fueling_timeline
+
+    ride, predicted_kcal = simulate_burn(age, sex, weight, height, distance, elevation_gain, ride_time, model)
+    with tracing.span("model.fueling_windows"):
+        return fueling_timeline(ride['timestamp'], predicted_kcal, ride['lap'], window_min=window_min)
+
+
+def estimate_timeline(age, sex, weight, height, distance, elevation_gain, ride_time, window_min=FUEL_WINDOW_MIN, model=None):
+    """
+    Same list as fuel_timeline, interpolated from the precomputed estimate
+    grid in microseconds instead of simulated. Answers outside the grid fall
+    back to fuel_timeline (with `model`, if given).
+    """
+    from estimate_grid import estimate_windows
+    from kcal_windows import format_timeline
+
+    windows = estimate_windows(age, sex, weight, height, distance, elevation_gain, ride_time, window_min=window_min)
+    if windows is None:
+        return fuel_timeline(age, sex, weight, height, distance, elevation_gain, ride_time, window_min=window_min, model=model)
+    return format_timeline(windows)
@@ -1,9 +1,77 @@
+import collections
+import mmap
 import os
+import threading
+
+import numpy as np
 from google.genai import types
 
-from config import MAX_CHARS
+from config import MAX_CHARS, NEWLINE_INDEX_CACHE_FILES
+
+# path -> (mtime_ns, size, byte offset of every line start), most recently used last
+_line_index_cache = collections.OrderedDict()
+_line_index_lock = threading.Lock()
+
+
+def line_starts(target_file, mm):
+    """
+    Byte offsets of every line start in the mapped file, built once per file
+    and rebuilt when its mtime or size changes.
+    """
+    stat = os.stat(target_file)
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _line_index_lock:
+        cached = _line_index_cache.get(target_file)
+        if cached is not None and cached[0] == key:
+            _line_index_cache.move_to_end(target_file)
+            return cached[1]
+
+    newlines = np.flatnonzero(np.frombuffer(mm, dtype=np.uint8) == ord("\n"))
+    starts = np.concatenate(([0], newlines + 1))
+    # A trailing newline does not start another line
+    if starts[-1] == len(mm):
+        starts = starts[:-1]
+
+    with _line_index_lock:
+        _line_index_cache[target_file] = (key, starts)
+        _line_index_cache.move_to_end(target_file)
+        while len(_line_index_cache) > NEWLINE_INDEX_CACHE_FILES:
+            _line_index_cache.popitem(last=False)
+    return starts
+
+
+def read_range(target_file, file_path, offset=None, length=None, start_line=None, end_line=None):
+    """
+    Reads a byte range or a 1-based inclusive line range through mmap.
+    At most MAX_CHARS bytes are returned.
+    """
+    if os.path.getsize(target_file) == 0:
+        return ""
+
+    with open(target_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if start_line is not None or end_line is not None:
+            starts = line_starts(target_file, mm)
+            first = int(start_line) if start_line is not None else 1
+            last = int(end_line) if end_line is not None else max(len(starts), first)
+            if not 1 <= first <= last:
+                return f'Error: Invalid line range start_line={first}, end_line={last}; expected 1 <= start_line <= end_line'
+            if first > len(starts):
+                return f'Error: "{file_path}" has only {len(starts)} lines'
+            begin = int(starts[first - 1])
+            end = int(starts[last]) if last < len(starts) else len(mm)
+        else:
+            begin = max(int(offset or 0), 0)
+            end = len(mm) if length is None else begin + max(int(length), 0)
 
-def get_file_content(working_directory, file_path):
+        end = min(end, len(mm))
+        stop = min(end, begin + MAX_CHARS)
+        file_content = mm[begin:stop].decode("utf-8", errors="replace")
+        if stop < end:
+            file_content += f'[...File "{file_path}" truncated at {MAX_CHARS} bytes, continue with offset={stop}]'
+        return file_content
+
+
+def get_file_content(working_directory, file_path, offset=None, length=None, start_line=None, end_line=None):
     abs_working_dir = os.path.abspath(working_directory)
     target_file = os.path.abspath(os.path.join(working_directory, file_path))
 
@@ -14,10 +82,13 @@ def get_file_content(working_directory, file_path):
         return f'Error: File not found or is not a regular file: "{file_path}"'
 
     try:
+        if any(arg is not None for arg in (offset, length, start_line, end_line)):
+            return read_range(target_file, file_path, offset, length, start_line, end_line)
+
         with open(target_file, "r") as f:
             file_content = f.read(MAX_CHARS)
             if os.path.getsize(target_file) > MAX_CHARS:
-                file_content += f'[...File "{file_path}" truncated at {MAX_CHARS} characters]'
+                file_content += f'[...File "{file_path}" truncated at {MAX_CHARS} characters, use offset/length or start_line/end_line to read further]'
         return file_content
     except Exception as e:
         return f'Error reading file "{target_file}": {e}'
@@ -25,7 +96,7 @@ def get_file_content(working_directory, file_path):
 
 schema_get_file_content = types.FunctionDeclaration(
     name="get_file_content",
-    description="Read file's content, constrained to the file path in the working directory.",
+    description=f"Read file's content, constrained to the file path in the working directory. Returns at most {MAX_CHARS} characters; pass a byte range or a line range to read any part of a large file.",
     parameters=types.Schema(
         type=types.Type.OBJECT,
         properties={
@@ -33,6 +104,22 @@ schema_get_file_content = types.FunctionDeclaration(
                 type=types.Type.STRING,
                 description="The file to read content from, relative to the working directory. Must be provided.",
             ),
+            "offset": types.Schema(
+                type=types.Type.INTEGER,
+                description="Optional byte offset to start reading at.",
+            ),
+            "length": types.Schema(
+                type=types.Type.INTEGER,
+                description="Optional number of bytes to read from offset.",
+            ),
+            "start_line": types.Schema(
+                type=types.Type.INTEGER,
+                description="Optional first line to read, 1-based. Takes precedence over offset/length.",
+            ),
+            "end_line": types.Schema(
+                type=types.Type.INTEGER,
+                description="Optional last line to read, inclusive. Defaults to the end of the file.",
+            ),
         },
     ),
 )
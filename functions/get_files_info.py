@@ -1,7 +1,15 @@
+import fnmatch
+import operator
 import os
+import re
 from google.genai import types
 
-def get_files_info(working_directory, directory="."):
+from config import FILES_INFO_PAGE_SIZE
+
+SORT_KEYS = ("name", "size", "mtime")
+
+
+def get_files_info(working_directory, directory=".", offset=0, limit=FILES_INFO_PAGE_SIZE, pattern=None, sort_by="name", descending=False):
     abs_working_dir = os.path.abspath(working_directory)
     target_dir = os.path.abspath(os.path.join(working_directory, directory))
 
@@ -11,15 +19,43 @@ def get_files_info(working_directory, directory="."):
     if not os.path.isdir(target_dir):
         return f'Error: "{directory}" is not a directory'
 
+    if sort_by not in SORT_KEYS:
+        return f'Error: sort_by must be one of {", ".join(SORT_KEYS)}'
+
     try:
+        offset = max(int(offset), 0)
+        limit = max(int(limit), 1)
+        with os.scandir(target_dir) as it:
+            if pattern is None:
+                entries = list(it)
+            else:
+                matches = re.compile(fnmatch.translate(pattern)).match
+                entries = [entry for entry in it if matches(entry.name)]
+
+        # Sorting by name needs no stat calls, so only the returned page gets stat'ed
+        if sort_by == "name":
+            entries.sort(key=operator.attrgetter("name"), reverse=descending)
+        elif sort_by == "size":
+            entries.sort(key=lambda entry: entry.stat().st_size, reverse=descending)
+        else:
+            entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=descending)
+
+        if offset and offset >= len(entries):
+            return f'No entries at offset {offset} (total {len(entries)})'
+
+        page = entries[offset:offset + limit]
         files_info = []
-        for filename in os.listdir(target_dir):
-            filepath = os.path.join(target_dir, filename)
-            file_size = os.path.getsize(filepath)
-            is_dir = os.path.isdir(filepath)
+        for entry in page:
+            files_info.append(
+                f'- {entry.name}: file_size={entry.stat().st_size} bytes, is_dir={entry.is_dir()}'
+            )
+        if len(entries) > offset + len(page):
             files_info.append(
-                f'- {filename}: file_size={file_size} bytes, is_dir={is_dir}'
+                f'[Showing entries {offset + 1}-{offset + len(page)} of {len(entries)}; '
+                f'use offset={offset + len(page)} for the next page]'
             )
+        elif offset:
+            files_info.append(f'[Showing entries {offset + 1}-{offset + len(page)} of {len(entries)}]')
         return "\n".join(files_info)
     except Exception as e:
         return f"Error: {e}"
@@ -27,7 +63,7 @@ def get_files_info(working_directory, directory="."):
 
 schema_get_files_info = types.FunctionDeclaration(
     name="get_files_info",
-    description="Lists files in the specified directory along with their sizes, constrained to the working directory.",
+    description="Lists files in the specified directory along with their sizes, constrained to the working directory. Large directories are returned a page at a time.",
     parameters=types.Schema(
         type=types.Type.OBJECT,
         properties={
@@ -35,6 +71,27 @@ schema_get_files_info = types.FunctionDeclaration(
                 type=types.Type.STRING,
                 description="The directory to list files from, relative to the working directory. If not provided, lists files in the working directory itself.",
             ),
+            "offset": types.Schema(
+                type=types.Type.INTEGER,
+                description="Number of entries to skip, for paging through large directories. Defaults to 0.",
+            ),
+            "limit": types.Schema(
+                type=types.Type.INTEGER,
+                description=f"Maximum number of entries to return. Defaults to {FILES_INFO_PAGE_SIZE}.",
+            ),
+            "pattern": types.Schema(
+                type=types.Type.STRING,
+                description="Optional glob pattern the file names must match, e.g. '*.csv'.",
+            ),
+            "sort_by": types.Schema(
+                type=types.Type.STRING,
+                description="Sort entries by 'name' (default), 'size' or 'mtime'.",
+                enum=list(SORT_KEYS),
+            ),
+            "descending": types.Schema(
+                type=types.Type.BOOLEAN,
+                description="Sort in descending order. Defaults to false.",
+            ),
         },
     ),
 )
@@ -1,7 +1,121 @@
+import atexit
+import gc
+import multiprocessing
 import os
+import runpy
 import subprocess
+import sys
+import tempfile
+import traceback
 from google.genai import types
 
+from config import RUN_PYTHON_PRELOAD, RUN_PYTHON_TIMEOUT_SEC
+
+
+def forkserver_available():
+    return "forkserver" in multiprocessing.get_all_start_methods()
+
+
+def worker_context():
+    """
+    forkserver context whose server process has already imported the heavy
+    libraries, so every script runs in a fresh child forked from a warm parent.
+    """
+    context = multiprocessing.get_context("forkserver")
+    # This module has to be preloaded too, or each child would re-import it to find the target
+    context.set_forkserver_preload(RUN_PYTHON_PRELOAD + [__name__])
+    return context
+
+
+def warm_up():
+    """
+    Starts the forkserver and its imports in the background ahead of the first call.
+    """
+    if forkserver_available():
+        worker_context()
+        from multiprocessing import forkserver
+        forkserver.ensure_running()
+
+
+def _run_script(abs_file_path, args, cwd, stdout_path, stderr_path):
+    # Runs in the forked child: sandbox cwd, capture fds 1/2 so output from
+    # C extensions and subprocesses is caught too, then shut down by hand
+    os.chdir(cwd)
+    for fd, path in ((1, stdout_path), (2, stderr_path)):
+        target = os.open(path, os.O_WRONLY | os.O_TRUNC)
+        os.dup2(target, fd)
+        os.close(target)
+    sys.stdout = open(1, "w", closefd=False)
+    sys.stderr = open(2, "w", closefd=False)
+    sys.argv = [abs_file_path] + list(args)
+    sys.path.insert(0, os.path.dirname(abs_file_path))
+
+    exit_code = 0
+    script_globals = None
+    try:
+        script_globals = runpy.run_path(abs_file_path, run_name="__main__")
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            exit_code = e.code
+        elif e.code is not None:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException:
+        traceback.print_exc()
+        exit_code = 1
+
+    # os._exit skips interpreter shutdown, so do the parts a script can
+    # observe: run its atexit handlers, then release its objects so files it
+    # left open are flushed and closed
+    atexit._run_exitfuncs()
+    script_globals = None
+    gc.collect()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(exit_code)
+
+
+def run_in_worker(abs_file_path, args, cwd, timeout=RUN_PYTHON_TIMEOUT_SEC):
+    """
+    Returns (stdout, stderr, returncode) like subprocess.run does.
+    """
+    with tempfile.TemporaryDirectory() as output_dir:
+        stdout_path = os.path.join(output_dir, "stdout")
+        stderr_path = os.path.join(output_dir, "stderr")
+        open(stdout_path, "w").close()
+        open(stderr_path, "w").close()
+
+        process = worker_context().Process(
+            target=_run_script,
+            args=(abs_file_path, args, cwd, stdout_path, stderr_path),
+        )
+        process.start()
+        process.join(timeout)
+        if process.is_alive():
+            process.kill()
+            process.join()
+            raise subprocess.TimeoutExpired(abs_file_path, timeout)
+
+        with open(stdout_path) as f:
+            stdout = f.read()
+        with open(stderr_path) as f:
+            stderr = f.read()
+        return stdout, stderr, process.exitcode
+
+
+def run_in_subprocess(abs_file_path, args, cwd, timeout=RUN_PYTHON_TIMEOUT_SEC):
+    commands = ["python", abs_file_path]
+    if args:
+        commands.extend(args)
+    completed_process = subprocess.run(
+        commands,
+        timeout=timeout,
+        capture_output=True,
+        text=True,
+        cwd=cwd,
+    )
+    return completed_process.stdout, completed_process.stderr, completed_process.returncode
+
 
 def run_python_file(working_directory, file_path, args=[]):
     abs_working_dir = os.path.abspath(working_directory)
@@ -18,23 +132,16 @@ def run_python_file(working_directory, file_path, args=[]):
 
     # https://docs.python.org/3/library/subprocess.html#subprocess.run
     try:
-        commands=["python", abs_file_path]
-        if args:
-            commands.extend(args)
-        completed_process = subprocess.run(
-            commands,
-            timeout=30,
-            capture_output=True,
-            text=True,
-            cwd=abs_working_dir,
-        )
+        # Warm forkserver workers where available, a fresh interpreter otherwise
+        run = run_in_worker if forkserver_available() else run_in_subprocess
+        stdout, stderr, returncode = run(abs_file_path, args or [], abs_working_dir)
         result = []
-        if completed_process.stdout:
-            result.append(f'STDOUT:\n{completed_process.stdout}')
-        if completed_process.stderr:
-            result.append(f'STDERR:\n{completed_process.stderr}')
-        if completed_process.returncode != 0:
-            result.append(f'Process exited with code {completed_process.returncode}')
+        if stdout:
+            result.append(f'STDOUT:\n{stdout}')
+        if stderr:
+            result.append(f'STDERR:\n{stderr}')
+        if returncode != 0:
+            result.append(f'Process exited with code {returncode}')
         return "\n".join(result) if result else "No output produced."
     except Exception as e:
         return f'Error: executing Python file: {e}'
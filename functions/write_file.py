@@ -1,13 +1,22 @@
+import glob
 import os
+import secrets
+import stat
 from google.genai import types
 
-def write_file(working_directory, file_path, content):
+WRITE_MODES = ("overwrite", "append", "atomic", "chunk")
+
+
+def write_file(working_directory, file_path, content, mode="overwrite", chunk_index=0, final=False):
     abs_working_dir = os.path.abspath(working_directory)
     target_file = os.path.abspath(os.path.join(working_directory, file_path))
 
     if not target_file.startswith(abs_working_dir):
         return f'Error: Cannot read "{file_path}" as it is outside the permitted working directory'
 
+    if mode not in WRITE_MODES:
+        return f'Error: mode must be one of {", ".join(WRITE_MODES)}'
+
     if not os.path.exists(target_file):
         try:
             os.makedirs(os.path.dirname(target_file), exist_ok=True)
@@ -18,6 +27,18 @@ def write_file(working_directory, file_path, content):
         return f'Error: "{file_path}" is a directory, not a file'
 
     try:
+        if mode == "append":
+            with open(target_file, "a") as f:
+                f.write(content)
+            return f'Successfully appended to "{file_path}" ({len(content)} characters written)'
+
+        if mode == "atomic":
+            replace_atomically(target_file, content)
+            return f'Successfully wrote to "{file_path}" atomically ({len(content)} characters written)'
+
+        if mode == "chunk":
+            return write_chunk(target_file, file_path, content, int(chunk_index), final)
+
         with open(target_file, "w") as f:
             f.write(content)
         return f'Successfully wrote to "{file_path}" ({len(content)} characters written)'
@@ -25,9 +46,86 @@ def write_file(working_directory, file_path, content):
         return f'Error while writing the content to the file "{file_path}": {e}'
 
 
+def replace_atomically(target_file, content):
+    """
+    Writes content to a temp file next to target_file and renames it over the
+    target, so readers see either the old or the new file, never a partial one.
+    """
+    directory, name = os.path.split(target_file)
+    temp_file = os.path.join(directory, f".{name}.{secrets.token_hex(8)}.tmp")
+    # Created like open() would (mode 0666 minus the umask), unlike mkstemp's 0600
+    fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        keep_mode(temp_file, target_file)
+        os.replace(temp_file, target_file)
+    except BaseException:
+        os.remove(temp_file)
+        raise
+
+
+def keep_mode(new_file, target_file):
+    """Gives new_file the permissions of the file it is about to replace, if there is one."""
+    try:
+        mode = stat.S_IMODE(os.stat(target_file).st_mode)
+    except FileNotFoundError:
+        return
+    os.chmod(new_file, mode)
+
+
+def chunk_path(target_file, next_index):
+    """
+    Hidden file collecting the chunks of target_file. Its name carries the
+    index of the next chunk expected, so a repeated, skipped or out-of-order
+    chunk is detected instead of being appended.
+    """
+    directory, name = os.path.split(target_file)
+    return os.path.join(directory, f".{name}.part-{next_index}")
+
+
+def pending_chunks(target_file):
+    directory, name = os.path.split(target_file)
+    return glob.glob(os.path.join(glob.escape(directory), f".{glob.escape(name)}.part-*"))
+
+
+def write_chunk(target_file, file_path, content, chunk_index, final):
+    """
+    Collects content sent across several calls in a hidden .part file next to
+    the target. Chunk 0 starts a new file; the final chunk renames it over the target.
+    """
+    if chunk_index == 0:
+        for stale in pending_chunks(target_file):
+            os.remove(stale)
+        part_file = chunk_path(target_file, 0)
+    else:
+        part_file = chunk_path(target_file, chunk_index)
+        if not os.path.exists(part_file):
+            pending = pending_chunks(target_file)
+            if not pending:
+                return f'Error: no chunks started for "{file_path}", send chunk_index=0 first'
+            expected = pending[0].rsplit("-", 1)[1]
+            return f'Error: expected chunk_index={expected} for "{file_path}", got {chunk_index}; nothing was written'
+
+    with open(part_file, "w" if chunk_index == 0 else "a") as f:
+        f.write(content)
+        if final:
+            f.flush()
+            os.fsync(f.fileno())
+
+    if not final:
+        os.replace(part_file, chunk_path(target_file, chunk_index + 1))
+        return f'Stored chunk {chunk_index} for "{file_path}" ({len(content)} characters written)'
+    keep_mode(part_file, target_file)
+    os.replace(part_file, target_file)
+    return f'Stored final chunk {chunk_index} and wrote "{file_path}" ({os.path.getsize(target_file)} bytes total)'
+
+
 schema_write_file = types.FunctionDeclaration(
     name="write_file",
-    description="Write or overwrite content to a file, constrained to the file path in the working directory.",
+    description="Write or overwrite content to a file, constrained to the file path in the working directory. Can also append, replace atomically, or build a large file from chunks sent over several calls.",
     parameters=types.Schema(
         type=types.Type.OBJECT,
         properties={
@@ -39,6 +137,19 @@ schema_write_file = types.FunctionDeclaration(
                 type=types.Type.STRING,
                 description="The content to write or overwrite into a file. Must be provided.",
             ),
+            "mode": types.Schema(
+                type=types.Type.STRING,
+                description="'overwrite' (default) replaces the file, 'append' adds to its end, 'atomic' replaces it via a temp file and rename, 'chunk' sends one piece of a file written over several calls.",
+                enum=list(WRITE_MODES),
+            ),
+            "chunk_index": types.Schema(
+                type=types.Type.INTEGER,
+                description="For mode 'chunk': 0 for the first piece, then 1, 2, ... in order. A repeated or skipped index is rejected.",
+            ),
+            "final": types.Schema(
+                type=types.Type.BOOLEAN,
+                description="For mode 'chunk': true on the last piece to publish the file.",
+            ),
         },
     ),
 )
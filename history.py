@@ -0,0 +1,109 @@
+from google.genai import types
+
+from config import HISTORY_KEEP_RECENT, HISTORY_MIN_COMPACT_CHARS, HISTORY_TOKEN_BUDGET
+
+# Rough chars-per-token ratio used when estimating prompt size locally
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(content):
+    return len(content.model_dump_json(exclude_none=True)) // CHARS_PER_TOKEN
+
+
+class HistoryManager:
+    """
+    Keeps the agent's message history under a token budget.
+
+    Before each generate_content call, function results from older tool
+    turns are replaced by a one-line reference (the model can call the tool
+    again if it needs the data). The newest `keep_recent` tool turns are
+    left alone unless the history is still over budget, in which case
+    everything but the latest turn is compacted, and then the oldest
+    call/result pairs are dropped.
+
+    Prompt/response token counts reported by the API are recorded per turn,
+    and tokens_saved adds up the estimated tokens not resent on each call.
+    """
+
+    def __init__(self, token_budget=HISTORY_TOKEN_BUDGET, keep_recent=HISTORY_KEEP_RECENT, min_compact_chars=HISTORY_MIN_COMPACT_CHARS):
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.min_compact_chars = min_compact_chars
+        self.turns = []
+        self.removed_tokens = 0
+        self.tokens_saved = 0
+
+    def estimate(self, messages):
+        return sum(estimate_tokens(content) for content in messages)
+
+    def compact(self, messages):
+        """
+        Compacts messages in place before a call and returns the estimated prompt tokens.
+        """
+        tool_turns = [
+            index for index, content in enumerate(messages)
+            if content.parts and any(part.function_response for part in content.parts)
+        ]
+        older = tool_turns[:-self.keep_recent] if self.keep_recent else tool_turns
+        for index in older:
+            self._compact_turn(messages, index)
+
+        tokens = self.estimate(messages)
+        if tokens > self.token_budget:
+            for index in tool_turns[len(older):-1]:
+                self._compact_turn(messages, index)
+            tokens = self.estimate(messages)
+
+        # Last resort: drop the oldest model call / tool result pairs, keeping the original request
+        while tokens > self.token_budget and len(messages) > 3 and self._is_call_pair(messages, 1):
+            removed = estimate_tokens(messages[1]) + estimate_tokens(messages[2])
+            del messages[1:3]
+            self.removed_tokens += removed
+            tokens -= removed
+
+        self.tokens_saved += self.removed_tokens
+        return tokens
+
+    def _is_call_pair(self, messages, index):
+        call, result = messages[index], messages[index + 1]
+        return (
+            call.role == "model"
+            and bool(result.parts)
+            and all(part.function_response for part in result.parts)
+        )
+
+    def _compact_turn(self, messages, index):
+        content = messages[index]
+        parts = []
+        for part in content.parts:
+            function_response = part.function_response
+            if function_response is None or function_response.response.get("compacted"):
+                parts.append(part)
+                continue
+            size = len(str(function_response.response))
+            if size < self.min_compact_chars:
+                parts.append(part)
+                continue
+            summary = f"[{function_response.name} returned {size} characters, call it again if they are needed]"
+            parts.append(types.Part.from_function_response(
+                name=function_response.name,
+                response={"result": summary, "compacted": True},
+            ))
+
+        compacted = types.Content(role=content.role, parts=parts)
+        self.removed_tokens += estimate_tokens(content) - estimate_tokens(compacted)
+        messages[index] = compacted
+
+    def record(self, response):
+        usage = response.usage_metadata
+        if usage is None:
+            return
+        self.turns.append((usage.prompt_token_count, usage.candidates_token_count))
+
+    def stats(self):
+        prompt_tokens = sum(prompt or 0 for prompt, _ in self.turns)
+        response_tokens = sum(candidates or 0 for _, candidates in self.turns)
+        return (
+            f"History: {len(self.turns)} turns, {prompt_tokens} prompt tokens, "
+            f"{response_tokens} response tokens, ~{self.tokens_saved} prompt tokens saved by compaction"
+        )
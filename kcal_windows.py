@@ -0,0 +1,102 @@
+import numpy as np
+
+from config import FUEL_MAX_INTAKE_KCAL_HR, FUEL_REPLACE_FRACTION, FUEL_WINDOW_MIN
+
+
+def elapsed_seconds(timestamps):
+    """
+    Seconds since the first sample for datetime64 values (Series, DatetimeIndex
+    or array, naive or tz-aware) or for numeric epoch seconds.
+    """
+    if hasattr(timestamps, 'dt'):
+        timestamps = timestamps.dt
+    if getattr(timestamps, 'tz', None) is not None:
+        timestamps = timestamps.tz_localize(None)
+    if hasattr(timestamps, 'to_numpy'):
+        values = timestamps.to_numpy()
+    elif hasattr(timestamps, 'to_series'):
+        values = timestamps.to_series().to_numpy()
+    else:
+        values = np.asarray(timestamps)
+
+    if np.issubdtype(values.dtype, np.datetime64):
+        return (values - values[0]) // np.timedelta64(1, 's')
+    return values - values[0]
+
+
+def burn_increments(predicted_kcal, laps=None):
+    """
+    Per-sample kcal from the model output, which is energy since the lap start.
+
+    The predictions are noisy sample to sample, so each lap is first turned
+    into its running maximum (energy spent never goes down) and then differenced.
+    A lap's first sample contributes its own value.
+    """
+    predicted_kcal = np.asarray(predicted_kcal, dtype=np.float64)
+    if laps is None:
+        new_lap = np.zeros(len(predicted_kcal), dtype=bool)
+    else:
+        laps = np.asarray(laps)
+        new_lap = np.concatenate(([False], laps[1:] != laps[:-1]))
+    new_lap[0] = True
+
+    # Offset every lap above the previous ones so one accumulate resets per lap
+    segment = np.cumsum(new_lap) - 1
+    offset = segment * (np.ptp(predicted_kcal) + 1)
+    envelope = np.maximum.accumulate(predicted_kcal + offset) - offset
+
+    increments = np.diff(envelope, prepend=0.0)
+    increments[new_lap] = np.maximum(envelope[new_lap], 0.0)
+    return increments
+
+
+def fueling_windows(timestamps, predicted_kcal, laps=None, window_min=FUEL_WINDOW_MIN,
+                    replace_fraction=FUEL_REPLACE_FRACTION, max_intake_kcal_hr=FUEL_MAX_INTAKE_KCAL_HR):
+    """
+    Aggregates the per-sample burn into fixed fueling windows.
+
+    The intake target replaces `replace_fraction` of the burn, but never
+    faster than `max_intake_kcal_hr` (what the gut can absorb). Returns a
+    dict of per-window arrays: end_sec, burn_kcal, intake_kcal and
+    deficit_kcal (cumulative burn minus cumulative intake).
+    """
+    window_sec = window_min * 60
+    index = (elapsed_seconds(timestamps) // window_sec).astype(np.int64)
+    n_windows = int(index[-1]) + 1
+
+    burn = np.bincount(index, weights=burn_increments(predicted_kcal, laps), minlength=n_windows)
+    end_sec = (np.arange(n_windows) + 1) * window_sec
+    return intake_schedule(end_sec, burn, replace_fraction, max_intake_kcal_hr)
+
+
+def intake_schedule(end_sec, burn, replace_fraction=FUEL_REPLACE_FRACTION, max_intake_kcal_hr=FUEL_MAX_INTAKE_KCAL_HR):
+    """
+    The fueling_windows dict for a per-window burn that is already known
+    (e.g. estimate_grid's interpolated one).
+    """
+    cumulative_burn = np.cumsum(burn)
+    cumulative_intake = np.minimum(cumulative_burn * replace_fraction, max_intake_kcal_hr * end_sec / 3600)
+    return {
+        'end_sec': end_sec,
+        'burn_kcal': burn,
+        'intake_kcal': np.diff(cumulative_intake, prepend=0.0),
+        'deficit_kcal': cumulative_burn - cumulative_intake,
+    }
+
+
+def fueling_timeline(timestamps, predicted_kcal, laps=None, **kwargs):
+    """
+    The compact list the planner and the LLM take: "Timestamp: HH:MM, kcal: N"
+    for every window that needs at least 1 kcal of intake.
+    """
+    return format_timeline(fueling_windows(timestamps, predicted_kcal, laps, **kwargs))
+
+
+def format_timeline(windows):
+    timeline = []
+    for end_sec, intake in zip(windows['end_sec'], windows['intake_kcal'].round().astype(int)):
+        if intake < 1:
+            continue
+        hours, minutes = divmod(int(end_sec) // 60, 60)
+        timeline.append(f"Timestamp: {hours:02d}:{minutes:02d}, kcal: {intake}")
+    return timeline
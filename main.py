@@ -1,26 +1,68 @@
+import functools
 import os
 import sys
-from dotenv import load_dotenv
-from google import genai
-from google.genai import types
 
-from prompts import system_prompt
-from config import MAX_ITERATIONS
-from call_function import available_functions, call_function
+import tracing
+from prompts import system_prompt, refinement_prompt
+from config import LLM_MODEL, MAX_ITERATIONS, TRACE_PREFIX, WORKING_DIR
 from fuel_model import fuel_model
+from planner import plan_fueling, write_notifications
 
 
 def main():
-    load_dotenv()
+    if "--profile-startup" in sys.argv:
+        from startup_profile import profile_startup
+        sys.exit(profile_startup(["main", "call_function"]))
+
+    if "--trace" not in sys.argv:
+        return run()
+
+    tracer = tracing.enable()
+    try:
+        run()
+    finally:
+        tracing.disable()
+        print(tracer.summary())
+        for path in tracing.export(tracer, TRACE_PREFIX):
+            print(f"Wrote {path}")
+
+
+def run():
     verbose = "--verbose" in sys.argv
 
     # Generate the model result
     model_result = fuel_model()
 
+    # Plan locally; the LLM is only an opt-in refinement pass
+    notifications = plan_fueling(model_result)
+    notifications_file = write_notifications(notifications, WORKING_DIR)
+    if "--llm" not in sys.argv:
+        if verbose:
+            print(f"Wrote {notifications_file}")
+        print("Final response:")
+        print(notifications)
+        return
+
+    # google-genai and the tool schemas take most of the startup time,
+    # so they are only imported once we know the agent loop will run
+    from dotenv import load_dotenv
+    from google import genai
+    from google.genai import types
+
+    # Warm the run_python_file workers while the first request is in flight
+    from functions.run_python_file import warm_up
+    warm_up()
+
+    load_dotenv()
     api_key = os.environ.get("GEMINI_API_KEY")
     client = genai.Client(api_key=api_key)
+    cache = None
+    if "--no-cache" not in sys.argv:
+        from response_cache import CachedClient
+        client = CachedClient(client)
+        cache = client.cache
 
-    user_prompt = " ".join(model_result)
+    user_prompt = " ".join(model_result) + refinement_prompt.format(notifications=notifications)
 
     messages = [
         types.Content(
@@ -29,29 +71,69 @@ def main():
         ),
     ]
 
-    for _ in range(MAX_ITERATIONS):
-        try:
-            final_response = generate_content(client, messages, verbose)
-            if final_response:
-                print("Final response:")
-                print(final_response)
-                return
-        except Exception as e:
-            print(f'Error in generate content: {e}')
-
-    print(f'Maximum iterations ({MAX_ITERATIONS}) reached.')
-    sys.exit(1)
-
-
-def generate_content(client, messages, verbose):
-    response = client.models.generate_content(
-        model='gemini-2.0-flash-001',
-        contents=messages,
-        config=types.GenerateContentConfig(
-            tools=[available_functions],
-            system_instruction=system_prompt,
-        ),
+    from history import HistoryManager
+    history = HistoryManager()
+
+    try:
+        for iteration in range(MAX_ITERATIONS):
+            try:
+                with tracing.span("agent.iteration", iteration=iteration):
+                    final_response = generate_content(client, messages, verbose, history)
+                if final_response:
+                    print("Final response:")
+                    print(final_response)
+                    return
+            except Exception as e:
+                print(f'Error in generate content: {e}')
+
+        print(f'Maximum iterations ({MAX_ITERATIONS}) reached.')
+        sys.exit(1)
+    finally:
+        if verbose:
+            print(history.stats())
+            if cache is not None:
+                print(cache.stats())
+
+
+def generate_content(client, messages, verbose, history=None, working_directory=WORKING_DIR):
+    if history is not None:
+        estimated_tokens = history.compact(messages)
+        if verbose:
+            print(f"Estimated prompt tokens after compaction: {estimated_tokens}")
+
+    with tracing.span("llm.generate_content", model=LLM_MODEL, messages=len(messages)) as span:
+        response = client.models.generate_content(
+            model=LLM_MODEL,
+            contents=messages,
+            config=content_config(),
+        )
+        usage = response.usage_metadata
+        if usage is not None:
+            span.set(prompt_tokens=usage.prompt_token_count, response_tokens=usage.candidates_token_count)
+    return handle_response(response, messages, verbose, history, working_directory)
+
+
+@functools.lru_cache(maxsize=None)
+def content_config():
+    from google.genai import types
+    from call_function import available_functions
+
+    return types.GenerateContentConfig(
+        tools=[available_functions],
+        system_instruction=system_prompt,
     )
+
+
+def handle_response(response, messages, verbose, history=None, working_directory=WORKING_DIR):
+    """
+    Appends the model turn and the results of any function calls to messages.
+    Returns the final text once the model stops calling functions.
+    """
+    from google.genai import types
+    from call_function import call_functions
+
+    if history is not None:
+        history.record(response)
     if verbose:
         print(f"Prompt tokens: {response.usage_metadata.prompt_token_count}")
         print(f"Response tokens: {response.usage_metadata.candidates_token_count}")
@@ -63,16 +145,20 @@ def generate_content(client, messages, verbose):
     if not response.function_calls:
         return response.text
 
+    with tracing.span("agent.tool_calls", calls=len(response.function_calls)):
+        function_call_results = call_functions(response.function_calls, verbose, working_directory=working_directory)
+
     function_call_responses = []
-    for function_call_part in response.function_calls:
-        function_call_result = call_function(function_call_part, verbose)
+    for function_call_result, latency in function_call_results:
         if (
             not function_call_result.parts
             or not function_call_result.parts[0].function_response.response
         ):
             raise Exception("Error: empty function call result")
         if verbose:
-            print(f"-> {function_call_result.parts[0].function_response.response}")
+            function_response = function_call_result.parts[0].function_response
+            print(f"-> {function_response.response}")
+            print(f"{function_response.name} took {latency * 1000:.1f} ms")
         function_call_responses.append(function_call_result.parts[0])
 
         if not function_call_responses:
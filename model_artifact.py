@@ -0,0 +1,150 @@
+import functools
+import json
+import sys
+
+import numpy as np
+
+from config import MODEL_ARTIFACT_PATH, MODEL_FEATURES, MODEL_PATH
+
+# Bump when the array layout below changes
+ARTIFACT_VERSION = 1
+
+
+def export_model(model_path=MODEL_PATH, artifact_path=MODEL_ARTIFACT_PATH):
+    """
+    Flattens the pickled XGBoost regressor into a small .npz artifact.
+
+    Only this export step needs xgboost (and the pickle); the artifact is read
+    back with NumPy alone. Every tree is stored as parallel node arrays and
+    the trees are concatenated, with `roots` holding each tree's first node.
+    XGBoost always places the right child right after the left one, so only
+    `left` is kept. Leaves point to themselves with an infinite threshold so
+    traversal can run a fixed number of steps.
+    """
+    import pickle
+
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    booster = model.get_booster()
+
+    dump = json.loads(booster.save_raw('json').decode())
+    learner = dump['learner']
+    objective = learner['objective']['name']
+    if objective != 'reg:squarederror':
+        raise ValueError(f'Unsupported objective: {objective}')
+
+    feature_names = booster.feature_names or MODEL_FEATURES
+    base_score = float(learner['learner_model_param']['base_score'].strip('[]'))
+    trees = learner['gradient_booster']['model']['trees']
+    best_iteration = getattr(model, 'best_iteration', None)
+    if best_iteration is not None:
+        trees = trees[:best_iteration + 1]
+
+    roots, left, feature, threshold, default_left, value = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for tree in trees:
+        tree_left = np.asarray(tree['left_children'], dtype=np.int32)
+        tree_right = np.asarray(tree['right_children'], dtype=np.int32)
+        nodes = np.arange(len(tree_left), dtype=np.int32)
+        is_leaf = tree_left == -1
+        if np.any(tree_right[~is_leaf] != tree_left[~is_leaf] + 1):
+            raise ValueError('Unsupported tree layout: right child does not follow the left child')
+
+        split_conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+        roots.append(offset)
+        left.append(np.where(is_leaf, nodes, tree_left) + offset)
+        feature.append(np.where(is_leaf, 0, tree['split_indices']).astype(np.int32))
+        threshold.append(np.where(is_leaf, np.inf, split_conditions).astype(np.float32))
+        default_left.append(is_leaf | np.asarray(tree['default_left'], dtype=bool))
+        # For leaves split_conditions holds the leaf value
+        value.append(np.where(is_leaf, split_conditions, 0).astype(np.float32))
+
+        depth = np.zeros(len(tree_left), dtype=np.int32)
+        for node in nodes:
+            if not is_leaf[node]:
+                depth[tree_left[node]] = depth[tree_right[node]] = depth[node] + 1
+        max_depth = max(max_depth, int(depth.max()))
+        offset += len(tree_left)
+
+    np.savez_compressed(
+        artifact_path,
+        version=np.int32(ARTIFACT_VERSION),
+        features=np.asarray(feature_names),
+        base_score=np.float32(base_score),
+        max_depth=np.int32(max_depth),
+        roots=np.asarray(roots, dtype=np.int32),
+        left=np.concatenate(left),
+        feature=np.concatenate(feature),
+        threshold=np.concatenate(threshold),
+        default_left=np.concatenate(default_left),
+        value=np.concatenate(value),
+    )
+    return artifact_path
+
+
+class CompiledModel:
+    """
+    NumPy-only predictor for an artifact written by export_model.
+    Drop-in for model.predict in make_realtime_prediction.
+    """
+
+    def __init__(self, artifact_path=MODEL_ARTIFACT_PATH):
+        with np.load(artifact_path, allow_pickle=False) as artifact:
+            version = int(artifact['version'])
+            if version != ARTIFACT_VERSION:
+                raise ValueError(f'Unsupported model artifact version {version} in "{artifact_path}"')
+            self.features = [str(name) for name in artifact['features']]
+            self.base_score = artifact['base_score']
+            self.max_depth = int(artifact['max_depth'])
+            self.roots = artifact['roots'].astype(np.intp)
+            self.left = artifact['left'].astype(np.intp)
+            self.feature = artifact['feature'].astype(np.intp)
+            self.threshold = artifact['threshold']
+            self.default_left = artifact['default_left']
+            self.value = artifact['value']
+
+    def predict(self, X):
+        """
+        Predicts for a DataFrame (columns picked by name) or a 2D array already in feature order.
+        """
+        if hasattr(X, 'columns'):
+            X = X[self.features].to_numpy()
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        n_rows, n_features = X.shape
+
+        # One column per tree; all trees descend one level per step
+        flat = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.intp) * n_features)[:, np.newaxis]
+        node = np.tile(self.roots, (n_rows, 1))
+        for _ in range(self.max_depth):
+            value = flat.take(row_offsets + self.feature.take(node))
+            go_left = value < self.threshold.take(node)
+            missing = np.isnan(value)
+            if missing.any():
+                go_left = np.where(missing, self.default_left.take(node), go_left)
+            node = self.left.take(node) + ~go_left
+
+        # Accumulate tree by tree in float32 starting from base_score, like XGBoost does
+        # (cumsum is sequential, unlike sum which adds pairwise)
+        leaves = np.empty((n_rows, len(self.roots) + 1), dtype=np.float32)
+        leaves[:, 0] = self.base_score
+        leaves[:, 1:] = self.value.take(node)
+        return np.cumsum(leaves, axis=1, dtype=np.float32)[:, -1]
+
+
+@functools.lru_cache(maxsize=None)
+def load_compiled_model(artifact_path=MODEL_ARTIFACT_PATH):
+    """
+    Loads the artifact on first use and keeps it for the life of the process.
+    """
+    return CompiledModel(artifact_path)
+
+
+if __name__ == '__main__':
+    model_path = sys.argv[1] if len(sys.argv) > 1 else MODEL_PATH
+    artifact_path = sys.argv[2] if len(sys.argv) > 2 else MODEL_ARTIFACT_PATH
+    export_model(model_path, artifact_path)
+    print(f'Exported "{model_path}" to "{artifact_path}"')
@@ -0,0 +1,148 @@
+"""
+Per-rider personalization of the global burn model.
+
+The pickled model is a gradient-boosted tree ensemble, so it has no
+coefficients to keep fitting. Each rider instead gets a linear correction
+on top of it, learned online with recursive least squares:
+
+    personal prediction = global prediction + [1, x / scale] . theta
+
+theta starts at zero (the global model, exactly) and every labelled sample
+updates theta and the 14 x 14 inverse covariance P in O(p^2), so a rider's
+model improves as rides come in without ever refitting on their history.
+The state is ~3 KB per rider and loads with a single np.load.
+"""
+import os
+
+import numpy as np
+
+from config import (
+    MODEL_FEATURES,
+    PERSONAL_MODEL_DIR,
+    PERSONALIZE_FEATURE_SCALE,
+    PERSONALIZE_FORGETTING,
+    PERSONALIZE_PRIOR_VARIANCE,
+)
+from model_artifact import load_compiled_model
+
+# Bump when the saved state layout changes
+PERSONAL_MODEL_VERSION = 1
+
+
+class PersonalModel:
+    """
+    A global model plus one rider's RLS correction. Drop-in for the compiled
+    model wherever .predict is used (make_realtime_prediction, StreamingPredictor).
+    """
+
+    def __init__(self, base_model=None, theta=None, P=None, samples=0, forgetting=PERSONALIZE_FORGETTING):
+        self.base_model = base_model if base_model is not None else load_compiled_model()
+        self.features = list(MODEL_FEATURES)
+        self.scale = np.array([PERSONALIZE_FEATURE_SCALE[name] for name in self.features], dtype=np.float64)
+        n_params = len(self.features) + 1
+        self.theta = np.zeros(n_params) if theta is None else np.asarray(theta, dtype=np.float64)
+        # Prior: the correction is small, so start from a finite variance
+        # rather than an uninformative one
+        self.P = np.eye(n_params) * PERSONALIZE_PRIOR_VARIANCE if P is None else np.asarray(P, dtype=np.float64)
+        self.samples = samples
+        self.forgetting = forgetting
+
+    def _inputs(self, X):
+        if hasattr(X, 'columns'):
+            X = X[self.features].to_numpy()
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        return X
+
+    def _regressors(self, X):
+        return np.hstack((np.ones((len(X), 1)), X / self.scale))
+
+    def correction(self, X):
+        return self._regressors(self._inputs(X)) @ self.theta
+
+    def predict(self, X):
+        X = self._inputs(X)
+        return self.base_model.predict(X) + self._regressors(X) @ self.theta
+
+    def update(self, X, y):
+        """
+        Folds labelled samples (features, observed kcal since lap start) into
+        the correction one at a time. Returns the prediction errors seen
+        before each update.
+        """
+        X = self._inputs(X)
+        y = np.asarray(y, dtype=np.float64).reshape(-1)
+        # The global model does not change, so its predictions can be made in one batch
+        residuals = y - self.base_model.predict(X)
+        errors = np.empty(len(y))
+        theta, P, forgetting = self.theta, self.P, self.forgetting
+        for i, x in enumerate(self._regressors(X)):
+            Px = P @ x
+            gain = Px / (forgetting + x @ Px)
+            errors[i] = residuals[i] - x @ theta
+            theta = theta + gain * errors[i]
+            P = (P - np.outer(gain, Px)) / forgetting
+        # Keep P symmetric against rounding drift
+        self.P = (P + P.T) / 2
+        self.theta = theta
+        self.samples += len(y)
+        return errors
+
+    def save(self, path):
+        """Writes theta and the upper triangle of P to path (.npz)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        upper = np.triu_indices(len(self.theta))
+        np.savez(
+            path,
+            version=np.int32(PERSONAL_MODEL_VERSION),
+            features=np.asarray(self.features),
+            theta=self.theta,
+            P_upper=self.P[upper],
+            samples=np.int64(self.samples),
+            forgetting=np.float64(self.forgetting),
+        )
+        return path
+
+    @classmethod
+    def load(cls, path, base_model=None):
+        with np.load(path, allow_pickle=False) as state:
+            version = int(state['version'])
+            if version != PERSONAL_MODEL_VERSION:
+                raise ValueError(f'Unsupported personal model version {version} in "{path}"')
+            if [str(name) for name in state['features']] != list(MODEL_FEATURES):
+                raise ValueError(f'"{path}" was trained on different features')
+            theta = state['theta']
+            P = np.zeros((len(theta), len(theta)))
+            upper = np.triu_indices(len(theta))
+            P[upper] = state['P_upper']
+            P = P + np.triu(P, 1).T
+            return cls(base_model, theta, P, int(state['samples']), float(state['forgetting']))
+
+
+def personal_model_path(rider_id, model_dir=PERSONAL_MODEL_DIR):
+    """The rider's state file in model_dir. Raises ValueError for a rider_id that is a path."""
+    from batch_planner import is_plain_rider_id
+
+    rider_id = str(rider_id)
+    if not is_plain_rider_id(rider_id):
+        raise ValueError(f'rider_id "{rider_id}" must be a plain name, not a path')
+    return os.path.join(model_dir, f'{rider_id}.npz')
+
+
+def load_personal_model(rider_id, model_dir=PERSONAL_MODEL_DIR, base_model=None):
+    """The rider's saved model, or a fresh one (same as the global model) for a new rider."""
+    path = personal_model_path(rider_id, model_dir)
+    if os.path.exists(path):
+        return PersonalModel.load(path, base_model)
+    return PersonalModel(base_model)
+
+
+def personalize(rider_id, X, y, model_dir=PERSONAL_MODEL_DIR, base_model=None):
+    """Loads a rider's model, updates it with labelled samples and saves it back."""
+    model = load_personal_model(rider_id, model_dir, base_model)
+    model.update(X, y)
+    model.save(personal_model_path(rider_id, model_dir))
+    return model
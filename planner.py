@@ -0,0 +1,83 @@
+import collections
+import itertools
+import os
+import re
+
+import tracing
+from config import FOOD_TABLE, MAX_SERVINGS, NOTIFICATIONS_FILE
+
+TIMELINE_PATTERN = re.compile(r"Timestamp:\s*(\d+:\d{2}),\s*kcal:\s*(\d+(?:\.\d+)?)")
+
+
+def parse_timeline(model_result):
+    """
+    Parses fuel_model() output ("Timestamp: 00:20, kcal: 100", ...) into [(timestamp, kcal), ...].
+    """
+    timeline = []
+    for entry in model_result:
+        match = TIMELINE_PATTERN.search(entry)
+        if not match:
+            raise ValueError(f'Cannot parse timeline entry: "{entry}"')
+        timeline.append((match.group(1), float(match.group(2))))
+    return timeline
+
+
+def food_combinations(food_table=FOOD_TABLE, max_servings=MAX_SERVINGS):
+    """
+    Every multiset of 0..max_servings foods with its total kcal, fewest servings first.
+    The empty combination lets a small target wait for the next notification.
+    """
+    combinations = []
+    for servings in range(max_servings + 1):
+        for foods in itertools.combinations_with_replacement(food_table, servings):
+            combinations.append((sum(food["kcal"] for food in foods), foods))
+    return combinations
+
+
+def choose_foods(kcal, combinations):
+    """
+    Picks the combination closest to kcal. Ties go to fewer servings, then to table order.
+    """
+    return min(combinations, key=lambda combination: abs(combination[0] - kcal))
+
+
+def describe(foods):
+    servings = collections.Counter((food["verb"], food["name"]) for food in foods)
+    return " and ".join(
+        f"{verb} {count} x {name}" if count > 1 else f"{verb} {name}"
+        for (verb, name), count in servings.items()
+    )
+
+
+@tracing.traced("planner.plan_fueling")
+def plan_fueling(model_result, food_table=FOOD_TABLE, max_servings=MAX_SERVINGS):
+    """
+    Turns the timestamped kcal list from fuel_model() into notifications in the same
+    format the LLM writes:
+
+        Notification 1: At 00:20 eat small banana (kcal: 90)
+
+    Whatever a notification over- or under-delivers is carried into the next one,
+    so total intake tracks the total target.
+    """
+    combinations = food_combinations(food_table, max_servings)
+    notifications = []
+    carry = 0.0
+    for timestamp, kcal in parse_timeline(model_result):
+        target = kcal + carry
+        total, foods = choose_foods(target, combinations)
+        carry = target - total
+        if not foods:
+            continue
+        notifications.append(
+            f"Notification {len(notifications) + 1}: At {timestamp} {describe(foods)} (kcal: {total})"
+        )
+    return "\n".join(notifications)
+
+
+def write_notifications(notifications, working_directory, file_path=NOTIFICATIONS_FILE):
+    target_file = os.path.join(working_directory, file_path)
+    os.makedirs(os.path.dirname(os.path.abspath(target_file)), exist_ok=True)
+    with open(target_file, "w") as f:
+        f.write(notifications + "\n")
+    return target_file
@@ -0,0 +1,99 @@
+import numpy as np
+
+from config import PLOT_HEXBIN_THRESHOLD, PLOT_LTTB_POINTS, PLOT_PATH
+from kcal_windows import elapsed_seconds
+
+
+def lttb(x, y, n_out=PLOT_LTTB_POINTS):
+    """
+    Largest-Triangle-Three-Buckets downsampling of a time series to n_out points.
+
+    Keeps the first and last point and, from each bucket in between, the point
+    forming the largest triangle with the point kept before it and the mean of
+    the next bucket, so peaks and dips survive. Returns the kept indices.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket edges for the n - 2 inner points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    # Mean of the following bucket, the last point for the final bucket
+    next_x = np.append(sums_x[1:] / counts[1:], x[-1])
+    next_y = np.append(sums_y[1:] / counts[1:], y[-1])
+
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        # Twice the triangle area, the constant factor does not change the argmax
+        area = np.abs(
+            (x[previous] - next_x[bucket]) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y[bucket] - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def scatter_or_hexbin(ax, x, y, threshold=PLOT_HEXBIN_THRESHOLD, **scatter_kwargs):
+    """
+    A scatter plot for up to `threshold` points, a hexbin density plot above,
+    whose cost depends on the grid size rather than on the number of points.
+    """
+    if len(x) <= threshold:
+        return ax.scatter(x, y, **scatter_kwargs)
+    collection = ax.hexbin(x, y, gridsize=80, bins='log', mincnt=1, cmap='Blues')
+    ax.figure.colorbar(collection, ax=ax, label='samples (log)')
+    return collection
+
+
+def plot_predictions(prediction_df, path=PLOT_PATH, show=False):
+    """
+    Predicted vs calculated kcal for a make_realtime_prediction result: both
+    series over time (LTTB downsampled) and their scatter (hexbin when large).
+
+    Renders with the Agg canvas, so no display is needed; the format follows
+    the file extension (.png, .svg, ...). With show=True it opens a window
+    through pyplot instead. Returns the path written, or None when shown.
+    """
+    from matplotlib.figure import Figure
+
+    predicted = prediction_df['Predicted_Kcal_Burn'].to_numpy()
+    calculated = prediction_df['calculated_power_kcal'].to_numpy()
+    hours = elapsed_seconds(prediction_df.index) / 3600
+
+    if show:
+        import matplotlib.pyplot as plt
+        figure = plt.figure(figsize=(10, 10))
+    else:
+        figure = Figure(figsize=(10, 10))
+    series_ax, scatter_ax = figure.subplots(2, 1, height_ratios=(1, 2))
+
+    for values, label, color in ((predicted, 'Predicted (XGBoost Model)', '#3b82f6'),
+                                 (calculated, 'Calculated (Power-Based)', '#f97316')):
+        kept = lttb(hours, values)
+        series_ax.plot(hours[kept], values[kept], label=label, color=color, linewidth=1)
+    series_ax.set_xlabel('Elapsed time (h)')
+    series_ax.set_ylabel('Kcal since lap start')
+    series_ax.legend()
+    series_ax.grid(True)
+
+    scatter_or_hexbin(scatter_ax, predicted, calculated, marker='o', color='#3b82f6', edgecolor='k', alpha=0.7)
+    scatter_ax.set_xlabel('Predicted Kcal Burn (XGBoost Model)')
+    scatter_ax.set_ylabel('Calculated Kcal Burn (Power-Based)')
+    scatter_ax.set_title('XGB Predicted vs Calculated Kcal Burn')
+    scatter_ax.grid(True)
+    figure.tight_layout()
+
+    if show:
+        plt.show()
+        return None
+    figure.savefig(path)
+    return path
@@ -17,3 +17,12 @@ Write the actual output into a file "notifications.txt".
 
 Read the "notifications.txt" file and output it into console.
 """
+
+refinement_prompt = """
+A deterministic planner has already written this draft into "notifications.txt":
+{notifications}
+
+Improve the food choices in "notifications.txt" only if they don't fit the timeline, keeping the same format.
+
+Read the "notifications.txt" file and output it into console.
+"""
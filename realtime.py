@@ -0,0 +1,133 @@
+import math
+
+import numpy as np
+
+from calories import LBS_TO_KG, calories_hr, calories_power
+from config import MODEL_FEATURES
+
+# Telemetry channels that arrive with every sample and may be missing (None/NaN)
+TELEMETRY = ('heart_rate', 'cadence', 'speed', 'power')
+
+
+def timestamp_to_seconds(timestamp):
+    """
+    Converts a datetime, pandas Timestamp, numpy datetime64 or epoch seconds to float seconds.
+    """
+    if isinstance(timestamp, (int, float, np.integer)):
+        return float(timestamp)
+    if isinstance(timestamp, np.datetime64):
+        return timestamp.astype('datetime64[ns]').astype(np.int64) / 1e9
+    return timestamp.timestamp()
+
+
+class StreamingPredictor:
+    """
+    Stateful per-rider version of make_realtime_prediction.
+
+    Samples are pushed one at a time (or in small batches) as they arrive.
+    Missing telemetry is imputed with the running mean of what has been seen
+    so far, duration_sec is tracked from the first sample of the current lap,
+    and the rider total adds up the last prediction of every finished lap.
+    State is a handful of scalars, so memory does not grow with ride length.
+    """
+
+    def __init__(self, model, age, sex, height, weight_lbs):
+        self.model = model
+        self.age = age
+        self.sex = sex
+        self.height = height
+        self.weight_lbs = weight_lbs
+        self.weight_kg = weight_lbs * LBS_TO_KG
+
+        self.sums = dict.fromkeys(TELEMETRY, 0.0)
+        self.counts = dict.fromkeys(TELEMETRY, 0)
+        self.lap = None
+        self.lap_start = None
+        self.closed_laps_kcal = 0.0
+        self.last_prediction = 0.0
+
+    @property
+    def kcal_total(self):
+        """
+        Predicted kcal for the ride so far.
+        """
+        return self.closed_laps_kcal + self.last_prediction
+
+    def running_mean(self, channel):
+        if not self.counts[channel]:
+            return math.nan
+        return self.sums[channel] / self.counts[channel]
+
+    def _impute(self, channel, value):
+        if value is None or math.isnan(value):
+            return self.running_mean(channel)
+        self.sums[channel] += value
+        self.counts[channel] += 1
+        return value
+
+    def _features(self, timestamp, heart_rate, cadence, speed, power, lap):
+        seconds = timestamp_to_seconds(timestamp)
+        new_lap = self.lap is not None and lap != self.lap
+        if lap != self.lap:
+            self.lap = lap
+            self.lap_start = seconds
+        duration_sec = int(seconds - self.lap_start)
+
+        values = {
+            'heart_rate': self._impute('heart_rate', heart_rate),
+            'cadence': self._impute('cadence', cadence),
+            'speed': self._impute('speed', speed),
+            'power': self._impute('power', power),
+            'lap': lap,
+            'age': self.age,
+            'sex': self.sex,
+            'height': self.height,
+            'weight_lbs': self.weight_lbs,
+            'weight_kg': self.weight_kg,
+            'duration_sec': duration_sec,
+        }
+        values['calories_hr'] = float(calories_hr(values['heart_rate'], duration_sec, self.weight_lbs, self.age, self.sex))
+        values['calories_power'] = float(calories_power(values['power'], duration_sec))
+        return [values[feature] for feature in MODEL_FEATURES], new_lap
+
+    def push(self, timestamp, heart_rate=None, cadence=None, speed=None, power=None, lap=1):
+        """
+        Adds one sample and returns the predicted kcal burn for it.
+        """
+        row, new_lap = self._features(timestamp, heart_rate, cadence, speed, power, lap)
+        prediction = float(self.model.predict(np.array([row], dtype=np.float64))[0])
+        if new_lap:
+            self.closed_laps_kcal += self.last_prediction
+        self.last_prediction = prediction
+        return prediction
+
+    def push_batch(self, samples):
+        """
+        Adds a small batch of samples (a list of dicts or a DataFrame with the
+        push() argument names as columns) with a single model call.
+        Returns the predictions as a numpy array.
+        """
+        if hasattr(samples, 'to_dict'):
+            samples = samples.to_dict('records')
+
+        rows = []
+        new_laps = []
+        for sample in samples:
+            row, new_lap = self._features(
+                sample['timestamp'],
+                *(sample.get(channel) for channel in TELEMETRY),
+                lap=sample.get('lap', 1),
+            )
+            rows.append(row)
+            new_laps.append(new_lap)
+        if not rows:
+            return np.empty(0)
+
+        predictions = np.asarray(self.model.predict(np.array(rows, dtype=np.float64)), dtype=np.float64)
+        previous = self.last_prediction
+        for prediction, new_lap in zip(predictions, new_laps):
+            if new_lap:
+                self.closed_laps_kcal += previous
+            previous = float(prediction)
+        self.last_prediction = previous
+        return predictions
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from google.genai import types
+
+from config import CACHE_DIR, CACHE_MAX_BYTES, CACHE_TTL_SEC
+
+
+def dump(value):
+    """
+    JSON-ready form of a genai pydantic object, or of a list/str of them.
+    """
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [dump(item) for item in value]
+    return value.model_dump(mode="json", exclude_none=True)
+
+
+def cache_key(model, contents, config):
+    """
+    sha256 of everything that decides the response: model name, system
+    instruction, tool declarations and the message history.
+    """
+    payload = {
+        "model": model,
+        "system_instruction": dump(getattr(config, "system_instruction", None)),
+        "tools": dump(getattr(config, "tools", None)),
+        "contents": dump(contents),
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    Content-addressed store of generate_content responses on local disk.
+
+    Each entry is a JSON file named after its key. The file mtime is bumped
+    on every hit, so when the directory grows past max_bytes the least
+    recently used entries are evicted first. Entries older than ttl_sec
+    (counted from when they were stored) are treated as misses and removed.
+
+    The directory is only scanned when a running total of the bytes stored
+    (seeded by the first scan) goes over max_bytes, so a put does not cost
+    O(cache size).
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, ttl_sec=CACHE_TTL_SEC):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_sec = ttl_sec
+        self.hits = 0
+        self.misses = 0
+        # Estimated bytes on disk; None until the first scan
+        self.total_bytes = None
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        if time.time() - entry["created"] > self.ttl_sec:
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        os.utime(path)
+        self.hits += 1
+        return entry["response"]
+
+    def put(self, key, response):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"created": time.time(), "response": response}, f)
+            size = os.path.getsize(temp_path)
+            replaced = self._size(path)
+            os.replace(temp_path, path)
+        except BaseException:
+            # The temp file was never counted in total_bytes
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        if self.total_bytes is None:
+            self.evict()
+        else:
+            self.total_bytes += size - replaced
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+
+    def evict(self):
+        """Rescans the directory, removes LRU entries down to max_bytes and resets the running total."""
+        entries = []
+        total = 0
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+        self.total_bytes = total
+
+    def _size(self, path):
+        try:
+            return os.path.getsize(path)
+        except FileNotFoundError:
+            return 0
+
+    def _remove(self, path):
+        size = self._size(path)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        if self.total_bytes is not None:
+            self.total_bytes -= size
+
+    def stats(self):
+        return f"Cache: {self.hits} hits, {self.misses} misses"
+
+
+class CachedModels:
+    def __init__(self, models, cache):
+        self.models = models
+        self.cache = cache
+
+    def generate_content(self, model, contents, config=None):
+        key = cache_key(model, contents, config)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return types.GenerateContentResponse.model_validate(cached)
+
+        response = self.models.generate_content(model=model, contents=contents, config=config)
+        self.cache.put(key, dump(response))
+        return response
+
+
+class CachedClient:
+    """
+    Wraps a genai.Client, or any stub with .models.generate_content, so
+    repeated requests are answered from the ResponseCache.
+    """
+
+    def __init__(self, client, cache=None):
+        self.client = client
+        self.cache = cache if cache is not None else ResponseCache()
+        self.models = CachedModels(client.models, self.cache)
@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+
+from calories import LBS_TO_KG, calories_hr, calories_power, calories_total
+from config import MODEL_FEATURES, SEX_CODES
+from fuel_model import normalize_sex
+
+# Integer channels cannot hold NaN, a missing heart rate or cadence is stored as this
+MISSING_INT = -1
+
+# Narrow per-sample dtypes; everything about the rider is stored once per ride
+TELEMETRY_DTYPES = {
+    'heart_rate': np.int16,
+    'cadence': np.int16,
+    'speed': np.float32,
+    'power': np.float32,
+    'lap': np.int16,
+    'Distance_km': np.float32,
+    'Elevation_m': np.float32,
+}
+
+
+def narrow(values, dtype):
+    values = np.asarray(values)
+    if np.issubdtype(dtype, np.integer) and np.issubdtype(values.dtype, np.floating):
+        values = np.where(np.isnan(values), MISSING_INT, np.round(values))
+    return values.astype(dtype, copy=False)
+
+
+class Ride:
+    """
+    One ride: telemetry columns in narrow dtypes plus the rider attributes
+    (age, sex, height, weight) as plain scalars.
+
+    The DataFrame from generate_cycling_data repeats the rider on every row and
+    keeps every column in 64 bits. A Ride takes a fraction of that memory, and
+    the 13-column model input is only built when feature_matrix() is called.
+    """
+
+    def __init__(self, timestamp, heart_rate, cadence, speed, power, age, sex, height, weight_lbs,
+                 lap=None, Distance_km=None, Elevation_m=None):
+        timestamp = pd.DatetimeIndex(timestamp)
+        if timestamp.tz is not None:
+            timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+        self.timestamp = timestamp.to_numpy().astype('datetime64[ms]')
+
+        self.age = age
+        # Labels are normalized (and unknown ones rejected) once, for both the HR formula and sex_code
+        self.sex = normalize_sex(sex) if isinstance(sex, str) else sex
+        self.height = height
+        self.weight_lbs = weight_lbs
+
+        n = len(self.timestamp)
+        channels = {
+            'heart_rate': heart_rate, 'cadence': cadence, 'speed': speed, 'power': power,
+            'lap': np.ones(n) if lap is None else lap,
+            'Distance_km': Distance_km, 'Elevation_m': Elevation_m,
+        }
+        self.columns = {}
+        for name, values in channels.items():
+            if values is None:
+                continue
+            values = narrow(values, TELEMETRY_DTYPES[name])
+            if len(values) != n:
+                raise ValueError(f'{name} has {len(values)} samples, timestamp has {n}')
+            self.columns[name] = values
+
+    @classmethod
+    def from_frame(cls, df, age=None, sex=None, height=None, weight_lbs=None):
+        """
+        Compacts a generate_cycling_data style DataFrame. Rider attributes
+        default to the first row of the matching columns.
+        """
+        def rider(name, value):
+            return df[name].iloc[0] if value is None else value
+
+        return cls(
+            df['timestamp'], df['heart_rate'], df['cadence'], df['speed'], df['power'],
+            age=rider('age', age), sex=rider('sex', sex), height=rider('height', height),
+            weight_lbs=rider('weight_lbs', weight_lbs),
+            **{name: df[name] for name in ('lap', 'Distance_km', 'Elevation_m') if name in df},
+        )
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    @property
+    def weight_kg(self):
+        return self.weight_lbs * LBS_TO_KG
+
+    @property
+    def sex_code(self):
+        """Numeric sex for the model; the HR formula keeps the label."""
+        return SEX_CODES[self.sex] if isinstance(self.sex, str) else self.sex
+
+    @property
+    def nbytes(self):
+        return self.timestamp.nbytes + sum(values.nbytes for values in self.columns.values())
+
+    def telemetry(self, name):
+        """A channel as float64 with missing samples as NaN."""
+        values = self.columns[name]
+        if np.issubdtype(values.dtype, np.integer):
+            return np.where(values == MISSING_INT, np.nan, values)
+        return values.astype(np.float64)
+
+    def duration_sec(self):
+        """
+        Whole seconds since the first sample of each lap, same as
+        calculate_duration_from_lap_start for rows ordered by lap and time.
+        """
+        laps = self.columns['lap']
+        positions = np.arange(len(laps))
+        new_lap = np.concatenate(([True], laps[1:] != laps[:-1]))
+        lap_start = np.maximum.accumulate(np.where(new_lap, positions, 0))
+        return (self.timestamp - self.timestamp[lap_start]) // np.timedelta64(1, 's')
+
+    def calories(self, duration_sec=None):
+        """(calories_hr, calories_power, calories_total) per sample, like add_calorie_columns."""
+        if duration_sec is None:
+            duration_sec = self.duration_sec()
+        kcal_hr = calories_hr(self.telemetry('heart_rate'), duration_sec, self.weight_lbs, self.age, self.sex)
+        kcal_power = calories_power(self.telemetry('power'), duration_sec)
+        return kcal_hr, kcal_power, calories_total(kcal_hr, kcal_power)
+
+    def feature_matrix(self, dtype=np.float32):
+        """
+        The model input in MODEL_FEATURES order, rider attributes broadcast
+        only here. Missing values in every per-sample column, including
+        calories_hr from a heart rate dropout, are filled with the column mean,
+        as make_realtime_prediction does for a DataFrame.
+        """
+        duration_sec = self.duration_sec()
+        kcal_hr, kcal_power, _ = self.calories(duration_sec)
+        values = {
+            'lap': self.columns['lap'], 'age': self.age, 'sex': self.sex_code, 'height': self.height,
+            'weight_lbs': self.weight_lbs, 'weight_kg': self.weight_kg, 'duration_sec': duration_sec,
+            'calories_hr': kcal_hr, 'calories_power': kcal_power,
+        }
+
+        X = np.empty((len(self), len(MODEL_FEATURES)), dtype=dtype)
+        for i, name in enumerate(MODEL_FEATURES):
+            column = values.get(name)
+            if column is None:
+                column = self.telemetry(name)
+            if np.ndim(column) and np.isnan(column).any():
+                column = np.where(np.isnan(column), np.nanmean(column), column)
+            X[:, i] = column
+        return X
+
+    def to_frame(self):
+        """The wide per-row DataFrame generate_cycling_data returns."""
+        duration_sec = self.duration_sec()
+        kcal_hr, kcal_power, kcal_total = self.calories(duration_sec)
+        df = pd.DataFrame({'timestamp': pd.DatetimeIndex(self.timestamp).tz_localize('UTC')})
+        for name in ('Distance_km', 'Elevation_m', 'power', 'heart_rate', 'cadence', 'speed'):
+            if name in self.columns:
+                df[name] = self.telemetry(name) if name in ('heart_rate', 'cadence') else self.columns[name]
+        df['age'] = self.age
+        df['weight_lbs'] = self.weight_lbs
+        df['weight_kg'] = self.weight_kg
+        df['sex'] = self.sex
+        df['height'] = self.height
+        df['lap'] = self.columns['lap']
+        df['duration_sec'] = duration_sec
+        df['calories_hr'] = kcal_hr
+        df['calories_power'] = kcal_power
+        df['calories_total'] = kcal_total
+        return df
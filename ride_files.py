@@ -0,0 +1,471 @@
+"""
+Streaming ingestion of device exports (FIT, GPX, TCX) into the telemetry
+schema the model pipeline takes: timestamp, power, heart_rate, cadence,
+speed (mph) and lap.
+
+Files are parsed incrementally and yielded as DataFrame chunks of at most
+RIDE_FILE_CHUNK_ROWS rows, so memory does not grow with the file size. XML
+elements are cleared as soon as a trackpoint is read, and FIT files are read
+through a small refillable buffer. Gzipped exports (.fit.gz, .gpx.gz, ...)
+are read the same way. ingest() spreads many files over a process pool and
+writes every ride as a columnar directory (see columnar.py).
+
+Chunks carry raw samples only: duration_sec and the calorie columns need the
+whole lap, so build them on the concatenated ride (read_ride) or feed the
+chunks to realtime.StreamingPredictor, which keeps per-lap state.
+
+    python ride_files.py export/*.fit.gz --out rides --workers 8
+"""
+import argparse
+import datetime
+import gzip
+import math
+import os
+import struct
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from config import RIDE_FILE_CHUNK_ROWS
+
+COLUMNS = ('timestamp', 'power', 'heart_rate', 'cadence', 'speed', 'lap')
+MPS_TO_MPH = 2.2369363
+EARTH_RADIUS_M = 6_371_000
+
+# FIT timestamps count seconds from 1989-12-31 00:00:00 UTC
+FIT_EPOCH = 631065600
+FIT_RECORD = 20
+FIT_LAP = 19
+# record field number -> (column, scale); enhanced_speed wins over speed when present
+FIT_RECORD_FIELDS = {
+    253: ('timestamp', 1),
+    3: ('heart_rate', 1),
+    4: ('cadence', 1),
+    6: ('speed', 1000),
+    73: ('enhanced_speed', 1000),
+    7: ('power', 1),
+}
+# Unsigned FIT base types by size, with their "invalid" value
+FIT_UINT = {1: ('B', 0xFF), 2: ('H', 0xFFFF), 4: ('I', 0xFFFFFFFF)}
+
+
+def open_file(path):
+    return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+
+
+def file_format(path):
+    name = path[:-3] if path.endswith('.gz') else path
+    extension = os.path.splitext(name)[1].lower().lstrip('.')
+    if extension not in PARSERS:
+        raise ValueError(f'Unsupported ride file: {path}')
+    return extension
+
+
+class ChunkBuilder:
+    """Collects samples column by column and hands them out as DataFrames."""
+
+    def __init__(self, chunk_rows=RIDE_FILE_CHUNK_ROWS):
+        self.chunk_rows = chunk_rows
+        self.columns = {name: [] for name in COLUMNS}
+
+    def add(self, timestamp, power=None, heart_rate=None, cadence=None, speed_mps=None, lap=1):
+        """timestamp is in epoch seconds; returns True once a chunk is full."""
+        columns = self.columns
+        columns['timestamp'].append(timestamp)
+        columns['power'].append(np.nan if power is None else power)
+        columns['heart_rate'].append(np.nan if heart_rate is None else heart_rate)
+        columns['cadence'].append(np.nan if cadence is None else cadence)
+        columns['speed'].append(np.nan if speed_mps is None else speed_mps * MPS_TO_MPH)
+        columns['lap'].append(lap)
+        return len(columns['timestamp']) >= self.chunk_rows
+
+    def flush(self):
+        if not self.columns['timestamp']:
+            return None
+        columns, self.columns = self.columns, {name: [] for name in COLUMNS}
+        return self.frame(columns)
+
+    @staticmethod
+    def frame(columns):
+        return pd.DataFrame({
+            # Whole milliseconds, so float seconds do not come back as ...999 us
+            'timestamp': pd.to_datetime(np.round(np.asarray(columns['timestamp']) * 1000).astype(np.int64), unit='ms', utc=True),
+            'power': np.asarray(columns['power'], dtype=np.float64),
+            'heart_rate': np.asarray(columns['heart_rate'], dtype=np.float64),
+            'cadence': np.asarray(columns['cadence'], dtype=np.float64),
+            'speed': np.asarray(columns['speed'], dtype=np.float64),
+            'lap': np.asarray(columns['lap'], dtype=np.int64),
+        })
+
+
+def empty_chunk():
+    """A chunk with no samples but the same columns and dtypes as the parsers' chunks."""
+    return ChunkBuilder.frame({name: [] for name in COLUMNS})
+
+
+# --- XML (GPX / TCX) ---
+
+def local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def child_values(element):
+    """{local tag: text} for every descendant with text, e.g. hr, cad, Watts."""
+    return {local_name(child.tag): child.text for child in element.iter() if child.text and child.text.strip()}
+
+
+def as_float(value):
+    return None if value is None else float(value)
+
+
+def epoch_seconds(text):
+    """ISO 8601 time from GPX/TCX as epoch seconds; times without an offset are UTC."""
+    moment = datetime.datetime.fromisoformat(text.strip())
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+    return moment.timestamp()
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def iter_gpx(f, chunk_rows=RIDE_FILE_CHUNK_ROWS):
+    """
+    GPX track points with the Garmin TrackPointExtension (hr, cad) and the
+    common <power> extension. Each <trkseg> is a lap. Speed comes from the
+    extension when present, otherwise from the distance to the previous point.
+    """
+    builder = ChunkBuilder(chunk_rows)
+    lap = 0
+    segment = None
+    previous = None
+    for event, element in ET.iterparse(f, events=('start', 'end')):
+        tag = local_name(element.tag)
+        if event == 'start':
+            if tag == 'trkseg':
+                lap += 1
+                segment = element
+                previous = None
+            continue
+        if tag != 'trkpt':
+            continue
+
+        values = child_values(element)
+        timestamp = epoch_seconds(values['time'])
+        lat, lon = float(element.get('lat')), float(element.get('lon'))
+        speed_mps = as_float(values.get('speed'))
+        if speed_mps is None and previous is not None:
+            seconds = timestamp - previous[0]
+            if seconds > 0:
+                speed_mps = haversine_m(previous[1], previous[2], lat, lon) / seconds
+        previous = (timestamp, lat, lon)
+
+        full = builder.add(timestamp, as_float(values.get('power')), as_float(values.get('hr')),
+                           as_float(values.get('cad')), speed_mps, max(lap, 1))
+        element.clear()
+        if full:
+            # Drop the cleared points the segment still references
+            if segment is not None:
+                segment.clear()
+            yield builder.flush()
+    chunk = builder.flush()
+    if chunk is not None:
+        yield chunk
+
+
+def iter_tcx(f, chunk_rows=RIDE_FILE_CHUNK_ROWS):
+    """
+    TCX trackpoints: HeartRateBpm/Value, Cadence, and Speed and Watts from the
+    ActivityExtension. Each <Lap> is a lap. Without a Speed extension, speed
+    comes from DistanceMeters between points.
+    """
+    builder = ChunkBuilder(chunk_rows)
+    lap = 0
+    track = None
+    previous = None
+    for event, element in ET.iterparse(f, events=('start', 'end')):
+        tag = local_name(element.tag)
+        if event == 'start':
+            if tag == 'Lap':
+                lap += 1
+            elif tag == 'Track':
+                track = element
+            continue
+        if tag != 'Trackpoint':
+            continue
+
+        values = child_values(element)
+        timestamp = epoch_seconds(values['Time'])
+        distance = as_float(values.get('DistanceMeters'))
+        speed_mps = as_float(values.get('Speed'))
+        if speed_mps is None and distance is not None and previous is not None:
+            seconds = timestamp - previous[0]
+            if seconds > 0:
+                speed_mps = (distance - previous[1]) / seconds
+        if distance is not None:
+            previous = (timestamp, distance)
+
+        # HeartRateBpm wraps its number in <Value>
+        full = builder.add(timestamp, as_float(values.get('Watts')), as_float(values.get('Value')),
+                           as_float(values.get('Cadence')), speed_mps, max(lap, 1))
+        element.clear()
+        if full:
+            if track is not None:
+                track.clear()
+            yield builder.flush()
+    chunk = builder.flush()
+    if chunk is not None:
+        yield chunk
+
+
+# --- FIT (binary) ---
+
+class BufferedReader:
+    """Reads a stream through one reusable buffer, refilled a block at a time."""
+
+    def __init__(self, f, block_size=1 << 20):
+        self.f = f
+        self.block_size = block_size
+        self.buffer = b''
+        self.pos = 0
+        self.consumed = 0
+
+    def take(self, n):
+        """Returns (buffer, offset) with n bytes available at offset; raises EOFError at the end."""
+        if len(self.buffer) - self.pos < n:
+            self.buffer = self.buffer[self.pos:] + self.f.read(max(n, self.block_size))
+            self.pos = 0
+            if len(self.buffer) < n:
+                raise EOFError
+        offset = self.pos
+        self.pos += n
+        self.consumed += n
+        return self.buffer, offset
+
+
+class FitDefinition:
+    """
+    One local message definition, compiled into a struct that unpacks a
+    whole data message at once, skipping fields we do not read.
+    """
+
+    def __init__(self, global_number, big_endian, fields, developer_size):
+        self.global_number = global_number
+        wanted = FIT_RECORD_FIELDS if global_number == FIT_RECORD else {253: ('timestamp', 1)}
+        layout = ['>' if big_endian else '<']
+        self.columns = []
+        for number, size, _ in fields:
+            if number in wanted and size in FIT_UINT:
+                code, invalid = FIT_UINT[size]
+                layout.append(code)
+                self.columns.append((wanted[number][0], wanted[number][1], invalid))
+            else:
+                layout.append(f'{size}x')
+        layout.append(f'{developer_size}x')
+        self.struct = struct.Struct(''.join(layout))
+
+    def decode(self, buffer, offset):
+        values = {}
+        for (column, scale, invalid), raw in zip(self.columns, self.struct.unpack_from(buffer, offset)):
+            if raw != invalid:
+                values[column] = raw / scale if scale != 1 else raw
+        return values
+
+
+def iter_fit_messages(f):
+    """
+    Yields (global message number, {column: value}) for record and lap
+    messages of a FIT file, or of several FIT files chained together.
+    """
+    reader = BufferedReader(f)
+    while True:
+        try:
+            buffer, offset = reader.take(12)
+        except EOFError:
+            return
+        header_size = buffer[offset]
+        data_size, = struct.unpack_from('<I', buffer, offset + 4)
+        if bytes(buffer[offset + 8:offset + 12]) != b'.FIT':
+            raise ValueError('Not a FIT file')
+        if header_size > 12:
+            reader.take(header_size - 12)
+        end = reader.consumed + data_size
+
+        definitions = {}
+        last_timestamp = 0
+        while reader.consumed < end:
+            buffer, offset = reader.take(1)
+            record_header = buffer[offset]
+
+            if record_header & 0x80:
+                # Compressed timestamp header: 5-bit offset from the last full timestamp
+                local = (record_header >> 5) & 0x03
+                time_offset = record_header & 0x1F
+                last_timestamp += (time_offset - last_timestamp) & 0x1F
+                definition = definitions[local]
+                buffer, offset = reader.take(definition.struct.size)
+                values = definition.decode(buffer, offset)
+                values.setdefault('timestamp', last_timestamp)
+            elif record_header & 0x40:
+                local = record_header & 0x0F
+                buffer, offset = reader.take(5)
+                big_endian = buffer[offset + 1] == 1
+                global_number, = struct.unpack_from('>H' if big_endian else '<H', buffer, offset + 2)
+                n_fields = buffer[offset + 4]
+                buffer, offset = reader.take(3 * n_fields)
+                fields = [tuple(buffer[offset + 3 * i:offset + 3 * i + 3]) for i in range(n_fields)]
+                developer_size = 0
+                if record_header & 0x20:
+                    buffer, offset = reader.take(1)
+                    n_developer = buffer[offset]
+                    buffer, offset = reader.take(3 * n_developer)
+                    developer_size = sum(buffer[offset + 3 * i + 1] for i in range(n_developer))
+                definitions[local] = FitDefinition(global_number, big_endian, fields, developer_size)
+                continue
+            else:
+                definition = definitions[record_header & 0x0F]
+                buffer, offset = reader.take(definition.struct.size)
+                values = definition.decode(buffer, offset)
+
+            if 'timestamp' in values:
+                last_timestamp = values['timestamp']
+            if definition.global_number in (FIT_RECORD, FIT_LAP):
+                yield definition.global_number, values
+
+        # File CRC
+        reader.take(2)
+
+
+def iter_fit(f, chunk_rows=RIDE_FILE_CHUNK_ROWS):
+    """
+    FIT record messages (timestamp, heart_rate, cadence, speed, power). A lap
+    message closes the current lap, so later records belong to the next one.
+    """
+    builder = ChunkBuilder(chunk_rows)
+    lap = 1
+    for number, values in iter_fit_messages(f):
+        if number == FIT_LAP:
+            lap += 1
+            continue
+        if 'timestamp' not in values:
+            continue
+        speed_mps = values.get('enhanced_speed', values.get('speed'))
+        if builder.add(values['timestamp'] + FIT_EPOCH, values.get('power'), values.get('heart_rate'),
+                       values.get('cadence'), speed_mps, lap):
+            yield builder.flush()
+    chunk = builder.flush()
+    if chunk is not None:
+        yield chunk
+
+
+PARSERS = {'fit': iter_fit, 'gpx': iter_gpx, 'tcx': iter_tcx}
+
+
+def iter_chunks(path, chunk_rows=RIDE_FILE_CHUNK_ROWS):
+    """Yields the samples of a FIT, GPX or TCX file (optionally gzipped) as DataFrame chunks."""
+    parser = PARSERS[file_format(path)]
+    with open_file(path) as f:
+        yield from parser(f, chunk_rows)
+
+
+def read_ride(path, chunk_rows=RIDE_FILE_CHUNK_ROWS):
+    """The whole ride as one DataFrame, ordered by lap and time."""
+    chunks = list(iter_chunks(path, chunk_rows))
+    if not chunks:
+        return empty_chunk()
+    return pd.concat(chunks, ignore_index=True)
+
+
+def ride_name(path):
+    """The file name without .gz and the format extension: 2024.05.01-am.fit.gz -> 2024.05.01-am."""
+    name = os.path.basename(path)
+    if name.endswith('.gz'):
+        name = name[:-3]
+    return os.path.splitext(name)[0]
+
+
+def unique_ride_names(paths):
+    """
+    ride_name for every path, with -2, -3, ... added to repeats (ride.fit and
+    ride.gpx, or the same name in two folders) so no two rides share an output directory.
+    """
+    names = []
+    taken = set()
+    for path in paths:
+        base = name = ride_name(path)
+        suffix = 1
+        while name in taken:
+            suffix += 1
+            name = f'{base}-{suffix}'
+        taken.add(name)
+        names.append(name)
+    return names
+
+
+def ingest_file(path, out_dir, name=None):
+    """
+    Streams one file into out_dir/<name>/ (columnar.py layout) chunk by chunk,
+    so memory stays bounded whatever the file size. name defaults to ride_name(path).
+    Returns (path, output directory, rows, laps).
+    """
+    from columnar import ColumnWriter
+
+    ride_dir = os.path.join(out_dir, name or ride_name(path))
+    laps = set()
+    with ColumnWriter(ride_dir) as writer:
+        for chunk in iter_chunks(path):
+            writer.append(chunk)
+            laps.update(chunk['lap'].unique().tolist())
+        if not writer.header['rows']:
+            writer.append(empty_chunk())
+    return path, ride_dir, writer.header['rows'], len(laps)
+
+
+def ingest(paths, out_dir, workers=None):
+    """
+    Parses many ride files on a process pool. Yields
+    (path, output directory, rows, laps) as files finish, or
+    (path, None, 0, error message) when a file fails.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(ingest_file, path, out_dir, name): path
+            for path, name in zip(paths, unique_ride_names(paths))
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield futures[future], None, 0, str(e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert FIT/GPX/TCX ride files into the telemetry schema.')
+    parser.add_argument('paths', nargs='+', help='.fit, .gpx or .tcx files, optionally .gz')
+    parser.add_argument('--out', default='rides', help='output directory, one columnar directory per file')
+    parser.add_argument('--workers', type=int, default=None, help='defaults to the number of CPUs')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    total_rows = failed = 0
+    for path, ride_dir, rows, laps in ingest(args.paths, args.out, args.workers):
+        if ride_dir is None:
+            failed += 1
+            print(f'{path}: failed, {laps}')
+            continue
+        total_rows += rows
+        print(f'{path}: {rows} samples, {laps} laps -> {ride_dir}')
+    elapsed = time.perf_counter() - start
+    print(f'Ingested {len(args.paths) - failed} files ({total_rows} samples) in {elapsed:.1f}s, {failed} failed')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,259 @@
+"""
+Local HTTP server for the ride form and the burn model.
+
+The compiled model is loaded once at startup. Concurrent requests hand their
+feature rows to a MicroBatcher, which waits up to SERVER_BATCH_WAIT_MS for
+more work and then runs one vectorized predict for all of them.
+
+    GET  /              index.html
+    POST /api/plan      ride form fields -> estimated kcal timeline and fueling plan
+    POST /api/predict   {"rows": [[13 features], ...]} -> {"kcal": [...]}
+    GET  /api/stats     p50/p99 latency per endpoint and batch sizes
+
+    python server.py --port 8000
+"""
+import argparse
+import collections
+import json
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from calories import LBS_TO_KG
+from config import (
+    MODEL_FEATURES,
+    SERVER_BATCH_MAX_ROWS,
+    SERVER_BATCH_WAIT_MS,
+    SERVER_HOST,
+    SERVER_LATENCY_WINDOW,
+    SERVER_PORT,
+)
+from model_artifact import load_compiled_model
+
+INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'index.html')
+CM_PER_FT = 30.48
+
+
+class _Pending:
+    __slots__ = ('X', 'done', 'result', 'error')
+
+    def __init__(self, X):
+        self.X = X
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Groups predict calls from many threads into one model call.
+
+    The first queued request opens a batch; the worker thread then takes
+    whatever else arrives within max_wait_ms (up to max_rows rows), predicts
+    all rows at once and hands every caller its slice.
+    """
+
+    def __init__(self, model, max_wait_ms=SERVER_BATCH_WAIT_MS, max_rows=SERVER_BATCH_MAX_ROWS):
+        self.model = model
+        self.max_wait = max_wait_ms / 1000
+        self.max_rows = max_rows
+        self.queue = queue.Queue()
+        self.batch_sizes = collections.deque(maxlen=SERVER_LATENCY_WINDOW)
+        threading.Thread(target=self._run, name='micro-batcher', daemon=True).start()
+
+    def predict(self, X):
+        if hasattr(X, 'columns'):
+            X = X[MODEL_FEATURES].to_numpy()
+        pending = _Pending(np.asarray(X, dtype=np.float32).reshape(-1, len(MODEL_FEATURES)))
+        self.queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        rows = len(batch[0].X)
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_rows:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                pending = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(pending)
+            rows += len(pending.X)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            self.batch_sizes.append(len(batch))
+            try:
+                predictions = self.model.predict(np.concatenate([pending.X for pending in batch]))
+                offsets = np.cumsum([len(pending.X) for pending in batch])[:-1]
+                for pending, result in zip(batch, np.split(predictions, offsets)):
+                    pending.result = result
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+            for pending in batch:
+                pending.done.set()
+
+
+class LatencyStats:
+    """Recent request latencies per endpoint, for the /api/stats report."""
+
+    def __init__(self, window=SERVER_LATENCY_WINDOW):
+        self.window = window
+        self.latencies = collections.defaultdict(lambda: collections.deque(maxlen=window))
+        self.counts = collections.Counter()
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, seconds):
+        with self.lock:
+            self.latencies[endpoint].append(seconds)
+            self.counts[endpoint] += 1
+
+    def report(self):
+        with self.lock:
+            latencies = {endpoint: np.array(values) * 1000 for endpoint, values in self.latencies.items()}
+            counts = dict(self.counts)
+        return {
+            endpoint: {
+                'requests': counts[endpoint],
+                'p50_ms': round(float(np.percentile(values, 50)), 2),
+                'p99_ms': round(float(np.percentile(values, 99)), 2),
+                'max_ms': round(float(values.max()), 2),
+            }
+            for endpoint, values in latencies.items()
+        }
+
+
+def plan_ride(form, model):
+    """
+    The index.html payload (metric units) -> estimate_timeline and plan_fueling.
+    Answers outside the estimate grid are simulated and predicted with model.
+    """
+    from fuel_model import estimate_timeline
+    from planner import plan_fueling
+
+    timeline = estimate_timeline(
+        age=float(form['age']),
+        sex=form.get('sex', ''),
+        weight=float(form['weightKg']) / LBS_TO_KG,
+        height=float(form['heightCm']) / CM_PER_FT,
+        distance=float(form['rideDistanceKm']),
+        elevation_gain=form.get('elevationGainM'),
+        ride_time=form.get('rideTimeMin'),
+        model=model,
+    )
+    return {'timeline': timeline, 'plan': plan_fueling(timeline)}
+
+
+class Handler(BaseHTTPRequestHandler):
+    # Set by make_server
+    batcher = None
+    stats = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self):
+        if self.path in ('/', '/index.html'):
+            with open(INDEX_PATH, 'rb') as f:
+                data = f.read()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif self.path == '/api/stats':
+            batch_sizes = np.array(self.batcher.batch_sizes or [0])
+            self.send_json(200, {
+                'endpoints': self.stats.report(),
+                'batches': {'count': len(self.batcher.batch_sizes), 'mean_requests': round(float(batch_sizes.mean()), 2),
+                            'max_requests': int(batch_sizes.max())},
+            })
+        else:
+            self.send_json(404, {'error': f'Not found: {self.path}'})
+
+    def do_POST(self):
+        if self.path not in ('/api/predict', '/api/plan'):
+            self.send_json(404, {'error': f'Not found: {self.path}'})
+            return
+
+        start = time.perf_counter()
+        try:
+            body = self.read_json()
+            if self.path == '/api/predict':
+                status, result = 200, {'kcal': self.batcher.predict(body['rows']).round(2).tolist()}
+            else:
+                status, result = 200, plan_ride(body, self.batcher)
+        except (KeyError, TypeError, ValueError) as e:
+            # Missing fields, wrong types, unparseable numbers and rides too short to simulate
+            status, result = 400, {'error': f'Bad request: {e}'}
+        except Exception as e:
+            status, result = 500, {'error': f'Internal error: {type(e).__name__}: {e}'}
+        self.send_json(status, result)
+        self.stats.record(self.path, time.perf_counter() - start)
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default listen backlog of 5 resets connections under a burst of clients
+    request_queue_size = 128
+
+
+def make_server(host=SERVER_HOST, port=SERVER_PORT, model=None, batch_wait_ms=SERVER_BATCH_WAIT_MS):
+    """A ready-to-serve Server sharing one model and batcher across requests."""
+    handler = type('BoundHandler', (Handler,), {
+        'batcher': MicroBatcher(model if model is not None else load_compiled_model(), batch_wait_ms),
+        'stats': LatencyStats(),
+    })
+    return Server((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the ride form and the burn model.')
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--batch-wait-ms', type=float, default=SERVER_BATCH_WAIT_MS,
+                        help='how long to wait for more requests to batch, 0 disables batching')
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, batch_wait_ms=args.batch_wait_ms)
+    # Warm the simulation imports, and load (or rebuild) the estimate grid,
+    # so the first request does not pay for them
+    import the_model  # noqa: F401
+    from estimate_grid import load_estimate_grid
+    load_estimate_grid()
+    print(f'Serving on http://{args.host}:{server.server_address[1]}/')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
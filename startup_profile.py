@@ -0,0 +1,80 @@
+"""
+Import-time profiler for the CLI entry points.
+
+Each module is imported in a fresh interpreter with `python -X importtime`,
+so the numbers are true cold-start costs. Exits non-zero when a module goes
+over its budget in config.STARTUP_BUDGET_MS, which makes it usable as a
+startup regression check in batch jobs and CI:
+
+    python startup_profile.py main the_model
+    python main.py --profile-startup
+"""
+import os
+import subprocess
+import sys
+
+from config import STARTUP_BUDGET_MS
+
+
+def import_times(module):
+    """
+    Returns [(name, self_ms, cumulative_ms, depth), ...] for a cold `import module`,
+    in the order the interpreter finished importing them.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr}")
+
+    times = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        times.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000, depth))
+    return times
+
+
+def profile_startup(modules, top=15, budgets=STARTUP_BUDGET_MS):
+    """
+    Prints the most expensive imports for each module and checks the budgets.
+    Returns 1 if any module is over budget, 0 otherwise.
+    """
+    over_budget = False
+    for module in modules:
+        times = import_times(module)
+        # The module's own tree is the run of nested imports right before its top-level line
+        end = next(i for i, (name, _, _, depth) in enumerate(times) if name == module and depth == 0)
+        start = end
+        while start > 0 and times[start - 1][3] > 0:
+            start -= 1
+        total_ms = times[end][2]
+        budget_ms = budgets.get(module)
+
+        status = ""
+        if budget_ms is not None:
+            status = f" (budget {budget_ms} ms)"
+            if total_ms > budget_ms:
+                status += " OVER BUDGET"
+                over_budget = True
+        print(f"{module}: {total_ms:.1f} ms cold import{status}")
+
+        # Direct imports only, nested imports are already in their cumulative time
+        heaviest = sorted(
+            (t for t in times[start:end] if t[3] == 1),
+            key=lambda t: t[2],
+            reverse=True,
+        )
+        for name, self_ms, cumulative_ms, _ in heaviest[:top]:
+            print(f"  {cumulative_ms:9.1f} ms  {name} (self {self_ms:.1f} ms)")
+
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(profile_startup(sys.argv[1:] or list(STARTUP_BUDGET_MS)))
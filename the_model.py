@@ -1,8 +1,13 @@
+import os
+import sys
+
 import pandas as pd
 import numpy as np
-import statsmodels.api as sm
-import matplotlib.pyplot as plt
-import pickle
+
+from calories import add_calorie_columns
+from config import MODEL_FEATURES, SIM_AVG_SPEED_KMH, SIM_ELEVATION_GAIN_M
+from model_artifact import load_compiled_model
+from ride import Ride
 
 # --- 1. Synthetic Time Series Dataset Generation for Cycling ---
 
@@ -33,19 +38,71 @@ def calories_power(row):
     kcal = (watts * duration) / (0.24 * 4184)
     return kcal
 
+def _lap_durations_fast(df):
+    """
+    Fast path for calculate_duration_from_lap_start.
+
+    Applies when timestamps are already datetime64 or epoch seconds with no
+    missing values, and rows are already ordered by lap and by time within
+    each lap. Returns None when the input does not qualify.
+    """
+    timestamps = df['timestamp']
+    laps = df['lap'].to_numpy()
+    if pd.api.types.is_integer_dtype(timestamps):
+        timestamps = pd.to_datetime(timestamps, unit='s', utc=True)
+    elif isinstance(timestamps.dtype, pd.DatetimeTZDtype):
+        timestamps = timestamps.dt.tz_convert('UTC')
+    elif pd.api.types.is_datetime64_dtype(timestamps):
+        timestamps = timestamps.dt.tz_localize('UTC')
+    else:
+        return None
+
+    # Naive UTC datetime64, tz-aware to_numpy() would give Timestamp objects
+    values = timestamps.dt.tz_localize(None).to_numpy()
+    if len(values) == 0 or np.isnat(values).any():
+        return None
+
+    # Laps must not go backwards and time must not go backwards within a lap
+    same_lap = laps[1:] == laps[:-1]
+    if not (same_lap | (laps[1:] > laps[:-1])).all():
+        return None
+    if (values[1:] < values[:-1])[same_lap].any():
+        return None
+
+    # Index of the first row of the lap each row belongs to
+    positions = np.arange(len(values))
+    lap_start = np.maximum.accumulate(np.where(np.concatenate(([True], ~same_lap)), positions, 0))
+
+    df = df.copy()
+    df['timestamp'] = timestamps
+    df['duration_sec'] = (values - values[lap_start]) // np.timedelta64(1, 's')
+    return df.reset_index(drop=True)
+
+
 def calculate_duration_from_lap_start(df):
     """
     Calculate duration in seconds from the start of each lap for every record.
     Handles mixed datetime formats and missing values - without nested functions.
+
+    Integer timestamps are read as epoch seconds. Input that is already
+    datetime64 (or epoch seconds) and ordered by lap and time skips parsing
+    and sorting entirely, see _lap_durations_fast.
     """
+    fast = _lap_durations_fast(df)
+    if fast is not None:
+        return fast
+
     df = df.copy()
     
     # Ensure timestamp is datetime - handle mixed formats
-    try:
-        df['timestamp'] = pd.to_datetime(df['timestamp'], format='mixed', errors='coerce', utc=True)
-    except:
-        # Fallback for older pandas versions
-        df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce', infer_datetime_format=True, utc=True)
+    if pd.api.types.is_integer_dtype(df['timestamp']):
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s', utc=True)
+    else:
+        try:
+            df['timestamp'] = pd.to_datetime(df['timestamp'], format='mixed', errors='coerce', utc=True)
+        except:
+            # Fallback for older pandas versions
+            df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce', infer_datetime_format=True, utc=True)
     
     # Remove rows with invalid timestamps
     initial_count = len(df)
@@ -60,24 +117,35 @@ def calculate_duration_from_lap_start(df):
     lap_start_times = df.groupby('lap')['timestamp'].min()
     
     # Map start times back to each record and calculate duration
+    # (total_seconds, not .dt.seconds, which wraps every 24 hours)
     df['lap_start_time'] = df['lap'].map(lap_start_times)
-    df['duration_sec'] = (df['timestamp'] - df['lap_start_time']).dt.seconds
+    df['duration_sec'] = (df['timestamp'] - df['lap_start_time']).dt.total_seconds().astype('int64')
     
     # Drop the temporary column
     df = df.drop('lap_start_time', axis=1)
     
     return df
 
-def generate_cycling_data(route_distance_km=40, sample_rate_sec=5,weight_lbs = 150, age = 30, sex = 0, height = 5.9):
+def simulate_telemetry(route_distance_km=40, sample_rate_sec=5, weight_lbs=150, rng=None,
+                       elevation_gain_m=SIM_ELEVATION_GAIN_M, duration_sec=None):
     """
-    Generates a synthetic time series dataset for a cycling ride,
-    including Time, Distance, Elevation, Power, and Heart Rate.
-    
-    The Power and HR are calculated based on the simulated Elevation profile.
+    The simulated per-sample columns of a ride: timestamp, Distance_km,
+    Elevation_m, power, heart_rate, cadence and speed, as a dict of arrays.
+    Shared by generate_cycling_data and generate_ride.
+
+    elevation_gain_m is the height of the main climb; duration_sec defaults
+    to the distance at SIM_AVG_SPEED_KMH.
     """
+    if rng is None:
+        rng = np.random
     
-    total_seconds = int((route_distance_km / 25) * 3600)  # Assume avg speed 25 km/h for estimation
+    if duration_sec is None:
+        total_seconds = int((route_distance_km / SIM_AVG_SPEED_KMH) * 3600)
+    else:
+        total_seconds = int(duration_sec)
     n_steps = total_seconds // sample_rate_sec
+    if n_steps < 1:
+        raise ValueError(f'A {total_seconds} s ride sampled every {sample_rate_sec} s has no samples')
     time_index = pd.to_datetime('2024-01-01 09:00:00') + pd.to_timedelta(np.arange(n_steps) * sample_rate_sec, unit='s')
     
     # --- Feature Generation ---
@@ -91,17 +159,18 @@ def generate_cycling_data(route_distance_km=40, sample_rate_sec=5,weight_lbs = 1
     
     # Section 1: 0-10km (Rolling hills/Flat)
     segment_1_end = int(0.25 * n_steps)
-    elevation[:segment_1_end] = np.random.normal(0, 1, segment_1_end).cumsum() + 100
+    elevation[:segment_1_end] = rng.normal(0, 1, segment_1_end).cumsum() + 100
     
     # Section 2: 10-25km (Major Climb)
     segment_2_start = segment_1_end
     segment_2_end = int(0.6 * n_steps)
-    climb_slope = np.linspace(0, 300, segment_2_end - segment_2_start)
+    climb_slope = np.linspace(0, elevation_gain_m, segment_2_end - segment_2_start)
     elevation[segment_2_start:segment_2_end] = elevation[segment_2_start-1] + climb_slope
     
     # Section 3: 25-35km (Descent and Finish)
     segment_3_start = segment_2_end
-    descent_slope = np.linspace(0, -250, n_steps - segment_3_start)
+    # Descend 5/6 of the climb (250 m of the default 300 m)
+    descent_slope = np.linspace(0, -elevation_gain_m * 5 / 6, n_steps - segment_3_start)
     elevation[segment_3_start:] = elevation[segment_3_start-1] + descent_slope
     
     # Smooth and clean up elevation to avoid sharp drops below start altitude
@@ -118,7 +187,7 @@ def generate_cycling_data(route_distance_km=40, sample_rate_sec=5,weight_lbs = 1
     
     # Power is highly dependent on positive elevation change (climbing effort)
     # Power = Base + (Elevation_Change * Factor) + Noise
-    power = base_power + (elevation_diff * 40) + np.random.normal(0, 15, n_steps)
+    power = base_power + (elevation_diff * 40) + rng.normal(0, 15, n_steps)
     
     # Minimum power is 0 (coasting)
     power = np.maximum(power, 0)
@@ -135,17 +204,17 @@ def generate_cycling_data(route_distance_km=40, sample_rate_sec=5,weight_lbs = 1
     hr_lagged = pd.Series(hr_raw).rolling(window=lag_window, min_periods=1).mean()
     
     # Add noise and apply limits
-    heart_rate = (hr_lagged + np.random.normal(0, 3, n_steps)).clip(lower=base_hr, upper=max_hr).round(0).astype(int)
+    heart_rate = (hr_lagged + rng.normal(0, 3, n_steps)).clip(lower=base_hr, upper=max_hr).round(0).astype(int)
     
     # calculate speed in miles per hour based on the power and weight of the rider and heart rate
-    speed = (power / (weight_lbs * 0.453592)) * 2.5 + np.random.normal(0, 1, n_steps)
+    speed = (power / (weight_lbs * 0.453592)) * 2.5 + rng.normal(0, 1, n_steps)
     speed = np.clip(speed, 5, 30).round(1)
 
     # calculate cadence as a function of power and speed
-    cadence = (power / 2) + np.random.normal(0, 5, n_steps)
+    cadence = (power / 2) + rng.normal(0, 5, n_steps)
     cadence = np.clip(cadence, 50, 120).round(0).astype(int)
 
-    df = pd.DataFrame({
+    return {
         'timestamp': time_index,
         'Distance_km': distance_km.round(2),
         'Elevation_m': elevation.round(1),
@@ -153,7 +222,20 @@ def generate_cycling_data(route_distance_km=40, sample_rate_sec=5,weight_lbs = 1
         'heart_rate': heart_rate,
         'cadence': cadence,
         'speed': speed
-    })
+    }
+
+def generate_cycling_data(route_distance_km=40, sample_rate_sec=5,weight_lbs = 150, age = 30, sex = 0, height = 5.9, rng=None, verbose=True,
+                          elevation_gain_m=SIM_ELEVATION_GAIN_M, duration_sec=None):
+    """
+    Generates a synthetic time series dataset for a cycling ride,
+    including Time, Distance, Elevation, Power, and Heart Rate.
+    
+    The Power and HR are calculated based on the simulated Elevation profile.
+    Pass a numpy.random.Generator as rng for reproducible rides; by default
+    the global np.random state is used.
+    """
+    telemetry = simulate_telemetry(route_distance_km, sample_rate_sec, weight_lbs, rng, elevation_gain_m, duration_sec)
+    df = pd.DataFrame(telemetry)
     df['age'] = np.repeat(age, len(df))
     df['weight_lbs'] = np.repeat(weight_lbs, len(df))
     df['weight_kg'] = df['weight_lbs'] * 0.453592
@@ -162,38 +244,50 @@ def generate_cycling_data(route_distance_km=40, sample_rate_sec=5,weight_lbs = 1
     df['lap'] = np.repeat(1, len(df))
     df_with_duration = calculate_duration_from_lap_start(df)
 
-    df_with_duration['calories_hr'] = df_with_duration.apply(calories_hr, axis=1)
-
-    df_with_duration['calories_power'] = df_with_duration.apply(calories_power, axis=1)
-    df_with_duration['calories_total'] = 0.7*df_with_duration['calories_hr'] + 0.3*df_with_duration['calories_power']
+    # Rider attributes are constant for the ride, so pass them once instead of per row
+    add_calorie_columns(df_with_duration, weight_lbs=weight_lbs, age=age, sex=sex)
 
     # df_with_duration.set_index('timestamp', inplace=True)
-    print(f"--- Generated Synthetic Cycling Data ({route_distance_km}km Ride) ---")
-    print(df_with_duration.head())
+    if verbose:
+        print(f"--- Generated Synthetic Cycling Data ({route_distance_km}km Ride) ---")
+        print(df_with_duration.head())
     return df_with_duration
 
+def generate_ride(route_distance_km=40, sample_rate_sec=5, weight_lbs=150, age=30, sex=0, height=5.9, rng=None,
+                  elevation_gain_m=SIM_ELEVATION_GAIN_M, duration_sec=None):
+    """
+    Same simulated ride as generate_cycling_data (for the same rng), as a
+    compact Ride that keeps the rider attributes once instead of per row.
+    """
+    telemetry = simulate_telemetry(route_distance_km, sample_rate_sec, weight_lbs, rng, elevation_gain_m, duration_sec)
+    return Ride(age=age, sex=sex, height=height, weight_lbs=weight_lbs, **telemetry)
+
 def make_realtime_prediction(model, test_data):
     """
     Makes predictions on a test dataset using the trained OLS model.
     """
     
-    features = [
-         'heart_rate', 'cadence', 'speed', 'power', 'lap', 'age',
-       'sex', 'height', 'weight_lbs', 'weight_kg', 'duration_sec',
-       'calories_hr', 'calories_power'
-    ]
-    # Ensure test data has required features and handle NaNs
-    X_test = test_data[features].fillna(test_data[features].mean())
-    # X_test = sm.add_constant(X_test, has_constant='add')
+    if isinstance(test_data, Ride):
+        # The wide feature matrix only exists for the prediction itself
+        X_test = test_data.feature_matrix()
+        test_time = pd.DatetimeIndex(test_data.timestamp).tz_localize('UTC')
+        calculated_kcal = test_data.calories()[2]
+    else:
+        features = MODEL_FEATURES
+        # Ensure test data has required features and handle NaNs
+        X_test = test_data[features].fillna(test_data[features].mean())
+        # X_test = sm.add_constant(X_test, has_constant='add')
+        test_time = test_data.timestamp
+        calculated_kcal = test_data['calories_total']
     
     # Prediction
     predicted_burn = model.predict(X_test).round(2)
     
     print("\n--- TEST DATA PREDICTION SAMPLE ---")
     prediction_df = pd.DataFrame({
-        'Test_Time': test_data.timestamp,
+        'Test_Time': test_time,
         'Predicted_Kcal_Burn': predicted_burn,
-        'calculated_power_kcal': test_data['calories_total'],
+        'calculated_power_kcal': calculated_kcal,
     }).set_index('Test_Time')
     
     print(prediction_df.head(10))
@@ -201,22 +295,47 @@ def make_realtime_prediction(model, test_data):
     return prediction_df, predicted_burn
 
 if __name__ == '__main__':
+    if '--profile-startup' in sys.argv:
+        from startup_profile import profile_startup
+        sys.exit(profile_startup(['the_model']))
+
+    import tracing
+    from config import PLOT_PATH, TRACE_PREFIX
+    tracer = tracing.enable() if '--trace' in sys.argv else None
+
     # 1. Generate the dummy data for a 40km ride (Source of truth)
-    df_test = generate_cycling_data(route_distance_km=40, sample_rate_sec=5, weight_lbs=150, age=30, sex=0, height=5.9)
+    with tracing.span('model.generate_data', distance_km=40):
+        df_test = generate_cycling_data(route_distance_km=40, sample_rate_sec=5, weight_lbs=150, age=30, sex=0, height=5.9)
 
-    with open('cal_burn_model.pkl', 'rb') as f:
-        cal_burn_model = pickle.load(f)
+    # NumPy-only export of the pickled model, see model_artifact.py
+    with tracing.span('model.load'):
+        cal_burn_model = load_compiled_model()
     
-    prediction_df, predicted_burn = make_realtime_prediction(cal_burn_model, df_test)
+    with tracing.span('model.predict', rows=len(df_test)):
+        prediction_df, predicted_burn = make_realtime_prediction(cal_burn_model, df_test)
 
-    with open('predicted_calorie_burn_test01.csv', 'w') as f:
-        prediction_df.to_csv(f)
+    # Columnar .npy files load without parsing, see columnar.py; --csv keeps the old output too
+    from columnar import write_columns
+    with tracing.span('model.write_output'):
+        write_columns(prediction_df, 'predicted_calorie_burn_test01')
+        if '--csv' in sys.argv:
+            with open('predicted_calorie_burn_test01.csv', 'w') as f:
+                prediction_df.to_csv(f)
 
     # 2. Plot Predicted vs Calculated Kcal Burn
-    plt.figure(figsize=(10, 8))
-    plt.scatter(prediction_df['Predicted_Kcal_Burn'], prediction_df['calculated_power_kcal'], marker='o', color='#3b82f6', linestyle='None', edgecolor='k', alpha=0.7)
-    plt.xlabel('Predicted Kcal Burn (XGBoost Model)')
-    plt.ylabel('Calculated Kcal Burn (Power-Based)')
-    plt.title('XGB Predicted vs Calculated Kcal Burn')
-    plt.grid(True)
-    plt.show()
+    # Headless by default (PNG, or SVG with --svg); --show opens a window instead
+    from plotting import plot_predictions
+    with tracing.span('model.plot'):
+        plot_path = plot_predictions(
+            prediction_df,
+            path=PLOT_PATH if '--svg' not in sys.argv else os.path.splitext(PLOT_PATH)[0] + '.svg',
+            show='--show' in sys.argv,
+        )
+    if plot_path:
+        print(f'Wrote {plot_path}')
+
+    if tracer is not None:
+        tracing.disable()
+        print(tracer.summary())
+        for path in tracing.export(tracer, TRACE_PREFIX):
+            print(f'Wrote {path}')
@@ -0,0 +1,175 @@
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+
+# The active Tracer, or None when tracing is off (the default)
+_tracer = None
+# Id of the innermost open span; contextvars so asyncio tasks and
+# asyncio.to_thread calls see their own parent
+_current_span = contextvars.ContextVar('current_span', default=None)
+_span_ids = itertools.count(1)
+
+
+class _NullSpan:
+    """What span() returns while tracing is off: a shared do-nothing context manager."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span_id = next(_span_ids)
+        self.parent_id = None
+
+    def set(self, **attributes):
+        """Adds attributes known only once the work is done, e.g. token counts."""
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.parent_id = _current_span.get()
+        self._token = _current_span.set(self.span_id)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        end_ns = time.perf_counter_ns()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attributes['error'] = f'{exc_type.__name__}: {exc}'
+        self.tracer.record({
+            'name': self.name,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_us': (self.start_ns - self.tracer.origin_ns) / 1000,
+            'duration_us': (end_ns - self.start_ns) / 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'attributes': self.attributes,
+        })
+        return False
+
+
+class Tracer:
+    """
+    Collects finished spans in memory; write_jsonl / write_chrome_trace
+    export them once the run is over.
+    """
+
+    def __init__(self):
+        self.origin_ns = time.perf_counter_ns()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def record(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def write_jsonl(self, path):
+        """One JSON object per finished span."""
+        with open(path, 'w') as f:
+            for span in self.spans:
+                f.write(json.dumps(span, default=str) + '\n')
+        return path
+
+    def write_chrome_trace(self, path):
+        """Trace Event Format, for chrome://tracing or ui.perfetto.dev."""
+        events = [
+            {
+                'name': span['name'],
+                'ph': 'X',
+                'ts': span['start_us'],
+                'dur': span['duration_us'],
+                'pid': span['pid'],
+                'tid': span['tid'],
+                'args': span['attributes'],
+            }
+            for span in self.spans
+        ]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+        return path
+
+    def summary(self):
+        """Total and mean duration per span name, slowest first."""
+        totals = {}
+        for span in self.spans:
+            count, total = totals.get(span['name'], (0, 0.0))
+            totals[span['name']] = (count + 1, total + span['duration_us'])
+        lines = [f"{'span':34} {'count':>6} {'total ms':>10} {'mean ms':>9}"]
+        for name, (count, total) in sorted(totals.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:34} {count:6d} {total / 1000:10.1f} {total / count / 1000:9.2f}")
+        return "\n".join(lines)
+
+
+def enable():
+    """Starts recording spans and returns the Tracer."""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def disable():
+    """Stops recording and returns the Tracer that was active, if any."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def enabled():
+    return _tracer is not None
+
+
+def span(name, **attributes):
+    """
+    Context manager timing the enclosed block:
+
+        with tracing.span("llm.generate_content", model=LLM_MODEL) as s:
+            response = ...
+            s.set(prompt_tokens=...)
+
+    While tracing is off this returns a shared no-op object, so instrumented
+    code pays one global lookup per span.
+    """
+    if _tracer is None:
+        return _NULL_SPAN
+    return Span(_tracer, name, attributes)
+
+
+def traced(name=None):
+    """Decorator version of span() for a whole function."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with Span(_tracer, span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def export(tracer, path_prefix):
+    """Writes <path_prefix>.jsonl and <path_prefix>.trace.json; returns both paths."""
+    directory = os.path.dirname(path_prefix)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return tracer.write_jsonl(f'{path_prefix}.jsonl'), tracer.write_chrome_trace(f'{path_prefix}.trace.json')